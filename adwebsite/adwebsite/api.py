@@ -0,0 +1,320 @@
+import json
+from collections import namedtuple
+from inspect import isawaitable
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, parse, validate_schema
+from graphql.error import GraphQLError
+from graphql.validation import specified_rules, validate
+
+from adwebsite import persisted, ratelimit, response_cache, tracing
+from adwebsite.cost import QueryCostRule, document_fragments, max_cost, operation_cost
+from adwebsite.planner import selected_fields
+
+
+def persisted_query_hash(request, data):
+    extensions = request.GET.get("extensions") or data.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+    persisted_query = (extensions or {}).get("persistedQuery") or {}
+    return persisted_query.get("sha256Hash")
+
+
+Operation = namedtuple("Operation", ["document", "ast", "cost", "depth"])
+
+
+class APIGraphQLView(GraphQLView):
+    """GraphQL endpoint that reuses parsed and validated documents.
+
+    Documents are cached by the sha256 of their text, which also lets clients
+    send automatic persisted queries: the ``persistedQuery`` extension with
+    just the hash once the server has seen the query text.  Operations over
+    the cost or depth budget fail validation, and the cost of every executed
+    operation is reported in the response ``extensions``.  Query results are
+    served from the response cache while none of their tags are invalidated.
+    Root fields and mutation costs are charged to the client's rate limits
+    (see ``adwebsite.ratelimit``).  Every operation is traced and reported by ``adwebsite.tracing``.
+
+    Resolvers are coroutines; this view drives them from a WSGI worker with
+    ``async_to_sync`` so ORM calls run on the worker's own thread.
+    """
+
+    validation_rules = (*specified_rules, QueryCostRule)
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        with tracing.operation(operation_name) as trace:
+            execution_result = self.execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+            tracing.finish(trace, execution_result)
+        return self.format_response(request, execution_result, id, show_graphiql)
+
+    def format_response(self, request, execution_result, id, show_graphiql=False):
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+
+            if execution_result.errors and any(
+                not getattr(e, "path", None) for e in execution_result.errors
+            ):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    @staticmethod
+    def format_error(error):
+        # The view answers an HttpError with just its message; keep the code and retry delay of a rate limit.
+        if isinstance(error, HttpError) and isinstance(error.__cause__, ratelimit.RateLimited):
+            return error.__cause__.error()
+        return GraphQLView.format_error(error)
+
+    def get_document(self, request, data, query):
+        return self.load_document(query, persisted_query_hash(request, data))
+
+    def load_document(self, query, sha256_hash=None):
+        """Return ``(document, validation_errors)``, from the document cache when possible."""
+        key, query = persisted.resolve(query, sha256_hash)
+        document = persisted.documents.get(key)
+        if document is not None:
+            return document, []
+        if not query:
+            raise persisted.PersistedQueryError("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+
+        document = parse(query)
+        validation_errors = validate(
+            self.schema.graphql_schema,
+            document,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if validation_errors:
+            return document, validation_errors
+        persisted.documents.put(key, document)
+        return document, []
+
+    def prepare_operation(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Return the ``Operation`` to run, or the ``ExecutionResult`` to answer with instead."""
+        if not query and persisted_query_hash(request, data) is None:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, validation_errors = self.get_document(request, data, query)
+        except persisted.PersistedQueryError as e:
+            return ExecutionResult(errors=[GraphQLError(str(e), extensions={"code": e.code})])
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        tracing.name_operation(operation_ast)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        cost, depth = operation_cost(schema, document, operation_name, variables)
+        try:
+            self.check_rate_limits(request, document, operation_ast, cost)
+        except ratelimit.RateLimited as e:
+            raise HttpError(e.response(), str(e)) from e
+        return Operation(document, operation_ast, cost, depth)
+
+    def check_rate_limits(self, request, document, operation_ast, cost):
+        """Charge the client the rates of the selected root fields and, for mutations, the operation's cost.
+
+        Raises ``ratelimit.RateLimited`` when one of them is spent.
+        """
+        if operation_ast is None:
+            return
+        info = SimpleNamespace(fragments=document_fragments(document))
+        fields = {name: len(nodes) for name, nodes in selected_fields(info, [operation_ast.selection_set]).items()}
+        mutation_cost = cost if operation_ast.operation == OperationType.MUTATION else None
+        ratelimit.check_operation(request, fields, mutation_cost)
+
+    def is_atomic(self, operation):
+        return (
+            operation.ast is not None
+            and operation.ast.operation == OperationType.MUTATION
+            and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+            )
+        )
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        operation = self.prepare_operation(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(operation, Operation):
+            return operation
+        # Resolve the session user here; the lazy lookup is not allowed inside the event loop.
+        request.user.is_authenticated
+        if self.is_atomic(operation):
+            return self.execute_atomic(request, operation, variables, operation_name)
+        return async_to_sync(self.execute_operation)(request, operation, variables, operation_name)
+
+    def execute_atomic(self, request, operation, variables, operation_name):
+        with transaction.atomic():
+            result = async_to_sync(self.execute_operation)(request, operation, variables, operation_name)
+            if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                transaction.set_rollback(True)
+        return result
+
+    async def execute_operation(self, request, operation, variables, operation_name):
+        cache_key = await sync_to_async(response_cache.lookup_key)(request, operation.document, operation.ast, variables)
+        data = await sync_to_async(response_cache.fetch)(cache_key) if cache_key else None
+        if data is not None:
+            result = ExecutionResult(data=data)
+        else:
+            result = await self.execute_document(request, operation.document, variables, operation_name)
+            if cache_key and not result.errors:
+                await sync_to_async(response_cache.store)(cache_key, result.data)
+        result.extensions = {
+            **(result.extensions or {}),
+            "cost": {"requested": operation.cost, "limit": max_cost(), "depth": operation.depth},
+        }
+        return result
+
+    async def execute_document(self, request, document, variables, operation_name):
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            result = execute(self.schema.graphql_schema, document, **execute_options)
+            if isawaitable(result):
+                result = await result
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+class AsyncAPIGraphQLView(APIGraphQLView):
+    """The same endpoint as an async view for the ASGI application.
+
+    Requests are executed on the event loop.  Django runs each request in its
+    own thread-sensitive context, so the ORM calls of concurrent requests run
+    in parallel on separate threads, as many at once as the connection pool
+    allows.  In the load tests this endpoint matched a threaded WSGI worker
+    because both ran on a single CPU core, not because its queries were
+    serialised.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            request.user = await request.auser()
+            if self.batch:
+                responses = [await self.aget_response(request, entry) for entry in data]
+                result = "[{}]".format(
+                    ",".join([response[0] for response in responses])
+                )
+                status_code = (
+                    responses
+                    and max(responses, key=lambda response: response[1])[1]
+                    or 200
+                )
+            else:
+                result, status_code = await self.aget_response(request, data)
+
+            return HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            )
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(
+                request, {"errors": [self.format_error(e)]}
+            )
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        with tracing.operation(operation_name) as trace:
+            operation = self.prepare_operation(request, data, query, variables, operation_name)
+            if not isinstance(operation, Operation):
+                execution_result = operation
+            elif self.is_atomic(operation):
+                execution_result = await sync_to_async(self.execute_atomic)(request, operation, variables, operation_name)
+            else:
+                execution_result = await self.execute_operation(request, operation, variables, operation_name)
+            tracing.finish(trace, execution_result)
+        return self.format_response(request, execution_result, id)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AdwebsiteConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'adwebsite'
+
+    def ready(self):
+        from adwebsite import signals
@@ -12,5 +12,19 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'adwebsite.settings')
+# Serve /graphql with the async view, whose resolvers run on the event loop.
+os.environ.setdefault('GRAPHQL_ASYNC', 'True')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready.
+from adwebsite.schema import schema  # noqa: E402
+from adwebsite.subscriptions import GraphQLWebSocket  # noqa: E402
+
+websocket_application = GraphQLWebSocket(schema)
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+
+def user_cache_timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+
+
+def user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def forget_user(user_id):
+    """Drop the cached user once the change that made it stale is committed."""
+    transaction.on_commit(lambda: cache.delete(user_key(user_id)))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that keeps the users of authenticated sessions in the cache.
+
+    Every request loads its session user, so caching it saves a query per
+    request.  Saving or deleting a ``User`` forgets it (see signals.py); other
+    processes sharing only a local-memory cache see the change once
+    ``AUTH_USER_CACHE_TIMEOUT`` expires.
+    """
+
+    def get_user(self, user_id):
+        timeout = user_cache_timeout()
+        if not timeout:
+            return super().get_user(user_id)
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, timeout)
+        return user
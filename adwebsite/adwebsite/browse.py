@@ -0,0 +1,48 @@
+from datetime import datetime
+
+# The orderBy lists served by an index, mapped to the keyset columns and
+# direction. posted_on breaks ties between equal prices, so spelling it out
+# is optional; mixed directions or other columns would need a sort.
+ORDERS = {
+    (): (("posted_on",), True),
+    ("POSTED_ON_DESC",): (("posted_on",), True),
+    ("POSTED_ON_ASC",): (("posted_on",), False),
+    ("PRICE_ASC",): (("product_price", "posted_on"), False),
+    ("PRICE_ASC", "POSTED_ON_ASC"): (("product_price", "posted_on"), False),
+    ("PRICE_DESC",): (("product_price", "posted_on"), True),
+    ("PRICE_DESC", "POSTED_ON_DESC"): (("product_price", "posted_on"), True),
+}
+
+# How cursor values of each keyset column are parsed back.
+CURSOR_PARSERS = {"posted_on": datetime.fromisoformat, "product_price": int}
+
+
+def product_order(order_by):
+    """Return ``(order_fields, parse_values, descending)`` for ``paginate`` from orderBy names."""
+    keys = tuple(order_by or ())
+    if keys not in ORDERS:
+        raise Exception(f"Unsupported product order: {', '.join(keys)}")
+    order_fields, descending = ORDERS[keys]
+    return order_fields, tuple(CURSOR_PARSERS[field] for field in order_fields), descending
+
+
+def browse_products(queryset, price_min=None, price_max=None, posted_by=None, posted_since=None):
+    """Filter ``queryset`` for the products browser.
+
+    Every filter is a range or equality on a column of product_recent_idx,
+    product_price_idx, product_seller_idx or product_seller_price_idx, so
+    with any order from ``ORDERS`` the page is read through one of them.
+    """
+    if price_min is not None and price_min < 0:
+        raise Exception("priceMin must not be negative")
+    if price_min is not None and price_max is not None and price_min > price_max:
+        raise Exception("priceMin must not be greater than priceMax")
+    if price_min is not None:
+        queryset = queryset.filter(product_price__gte=price_min)
+    if price_max is not None:
+        queryset = queryset.filter(product_price__lte=price_max)
+    if posted_by is not None:
+        queryset = queryset.filter(posted_by=posted_by)
+    if posted_since is not None:
+        queryset = queryset.filter(posted_on__gte=posted_since)
+    return queryset
@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.db import transaction
+
+from adwebsite import conversations, pubsub, response_cache, stats
+from adwebsite.models import Chat, Product, User
+
+# Bulk mutations validate every item with one ``id__in`` query per referenced
+# model and write the valid ones in a single transaction.  Each function
+# returns the results aligned with its input (``None`` where an item failed)
+# and a list of ``(index, message)`` errors for the failed items.
+
+
+def max_bulk_size():
+    return getattr(settings, "GRAPHQL_MAX_BULK_SIZE", 1000)
+
+
+def check_size(items):
+    if len(items) > max_bulk_size():
+        raise Exception(f"At most {max_bulk_size()} items can be sent at once, got {len(items)}")
+
+
+def existing_users(ids):
+    return set(User.objects.filter(id__in=ids).values_list("id", flat=True)) if ids else set()
+
+
+def invalidate_products(products):
+    tags = ["products", *{f"seller:{product.posted_by_id}" for product in products}]
+    transaction.on_commit(lambda: response_cache.invalidate(*tags))
+
+
+def invalidate_chats(chats):
+    tags = ["chats", *{f"thread:{chat.sent_by_id}:{chat.sent_to_id}" for chat in chats}]
+    transaction.on_commit(lambda: response_cache.invalidate(*tags))
+
+
+def create_products(items):
+    check_size(items)
+    results, errors = [None] * len(items), []
+    with transaction.atomic():
+        users = User.objects.in_bulk({item.posted_by for item in items})
+        for index, item in enumerate(items):
+            user = users.get(item.posted_by)
+            if not user:
+                errors.append((index, f"User with id {item.posted_by} does not exists"))
+                continue
+            results[index] = Product(
+                product_name=item.product_name,
+                product_description=item.product_description,
+                product_price=item.product_price,
+                posted_by=user,
+            )
+
+        created = [product for product in results if product]
+        if created:
+            Product.objects.bulk_create(created)
+            stats.add_products(created)
+            invalidate_products(created)
+    return results, errors
+
+
+def update_products(items):
+    check_size(items)
+    results, errors = [None] * len(items), []
+    with transaction.atomic():
+        products = Product.objects.in_bulk({item.product_id for item in items})
+        not_owners = [item.posted_by for item in items if item.product_id in products and products[item.product_id].posted_by_id != item.posted_by]
+        users = existing_users(not_owners)
+
+        changed, fields = {}, set()
+        for index, item in enumerate(items):
+            product = products.get(item.product_id)
+            if not product:
+                errors.append((index, f"Product with id {item.product_id} does not exist."))
+                continue
+            if product.posted_by_id != item.posted_by:
+                if item.posted_by not in users:
+                    errors.append((index, f"User with id {item.posted_by} does not exist."))
+                else:
+                    errors.append((index, f"User with id {item.posted_by} is not the owner of this ad"))
+                continue
+
+            for field in ("product_name", "product_description", "product_price"):
+                value = getattr(item, field, None)
+                if value:
+                    setattr(product, field, value)
+                    fields.add(field)
+                    changed[product.pk] = product
+            results[index] = product
+
+        if fields:
+            Product.objects.bulk_update(changed.values(), sorted(fields))
+            invalidate_products(changed.values())
+    return results, errors
+
+
+def delete_products(items):
+    check_size(items)
+    results, errors = [None] * len(items), []
+    with transaction.atomic():
+        products = Product.objects.only("id", "posted_by").in_bulk({item.id for item in items})
+        for index, item in enumerate(items):
+            product = products.get(item.id)
+            if not product:
+                errors.append((index, f"product with this id does not exists: {item.id}"))
+            elif product.posted_by_id != item.user_id:
+                errors.append((index, f"User with id {item.user_id} is not the owner of this ad"))
+            else:
+                results[index] = item.id
+
+        deleted = {id for id in results if id is not None}
+        if deleted:
+            stats.remove_products([products[id] for id in deleted])
+            Product.objects.filter(id__in=deleted).delete()
+    return results, errors
+
+
+def create_messages(items):
+    check_size(items)
+    results, errors = [None] * len(items), []
+    with transaction.atomic():
+        users = User.objects.in_bulk({item.sent_by for item in items} | {item.sent_to for item in items})
+        products = Product.objects.in_bulk({item.product_id for item in items})
+        for index, item in enumerate(items):
+            sending_user, receiving_user = users.get(item.sent_by), users.get(item.sent_to)
+            product = products.get(item.product_id)
+            if not sending_user:
+                errors.append((index, f"User with id {item.sent_by} does not exist"))
+            elif not receiving_user:
+                errors.append((index, f"User with id {item.sent_to} does not exist"))
+            elif sending_user.id == receiving_user.id:
+                errors.append((index, f"User cannot message to self"))
+            elif not product:
+                errors.append((index, f"Product with id {item.product_id} does not exist"))
+            elif product.posted_by_id != receiving_user.id:
+                errors.append((index, f"Product with id {item.product_id} is not posted by the receiving user"))
+            else:
+                results[index] = Chat(message=item.message, sent_by=sending_user, sent_to=receiving_user, product_id=product)
+
+        created = [chat for chat in results if chat]
+        if created:
+            Chat.objects.bulk_create(created)
+            conversations.record_messages(created)
+            stats.add_messages(created)
+            invalidate_chats(created)
+            for chat in created:
+                pubsub.publish_chat(pubsub.chat_event("created", chat))
+    return results, errors
+
+
+def update_messages(items):
+    check_size(items)
+    results, errors = [None] * len(items), []
+    with transaction.atomic():
+        chats = Chat.objects.in_bulk({item.id for item in items})
+        not_owners = [item.user_id for item in items if item.id in chats and chats[item.id].sent_by_id != item.user_id]
+        users = existing_users(not_owners)
+
+        changed = {}
+        for index, item in enumerate(items):
+            chat = chats.get(item.id)
+            if not chat:
+                errors.append((index, f"Message with id {item.id} does not exist"))
+                continue
+            if chat.sent_by_id != item.user_id:
+                if item.user_id not in users:
+                    errors.append((index, f"User with id {item.user_id} does not exist"))
+                else:
+                    errors.append((index, f"You cannot update this message"))
+                continue
+            if item.message:
+                chat.message = item.message
+                changed[chat.pk] = chat
+            results[index] = chat
+
+        if changed:
+            Chat.objects.bulk_update(changed.values(), ["message"])
+            for chat in changed.values():
+                conversations.record_update(chat)
+            invalidate_chats(changed.values())
+            for chat in changed.values():
+                pubsub.publish_chat(pubsub.chat_event("updated", chat))
+    return results, errors
+
+
+def delete_messages(items):
+    check_size(items)
+    results, errors = [None] * len(items), []
+    with transaction.atomic():
+        chats = Chat.objects.in_bulk({item.id for item in items})
+        for index, item in enumerate(items):
+            chat = chats.get(item.id)
+            if not chat:
+                errors.append((index, f"Message with this id does not exists: {item.id}"))
+            elif chat.sent_by_id != item.user_id:
+                errors.append((index, f"User with id {item.user_id} is not the owner of this message"))
+            else:
+                results[index] = item.id
+
+        deleted = {id for id in results if id is not None}
+        if deleted:
+            events = [pubsub.chat_event("deleted", chats[id]) for id in deleted]
+            Chat.objects.filter(id__in=deleted).delete()
+            threads = {}
+            for id in deleted:
+                chat = chats[id]
+                threads.setdefault((chat.product_id_id, frozenset((chat.sent_by_id, chat.sent_to_id))), []).append(chat)
+            for thread in threads.values():
+                conversations.refresh(thread)
+            stats.remove_messages([chats[id] for id in deleted])
+            for event in events:
+                pubsub.publish_chat(event)
+    return results, errors
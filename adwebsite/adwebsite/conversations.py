@@ -0,0 +1,126 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from adwebsite import stats
+from adwebsite.models import Chat, Conversation
+
+
+def thread_key(chat, seller_id):
+    """Return ``(product_id, buyer_id, seller_id)`` of the conversation ``chat`` belongs to."""
+    buyer_id = chat.sent_to_id if chat.sent_by_id == seller_id else chat.sent_by_id
+    return chat.product_id_id, buyer_id, seller_id
+
+
+def thread_conversations(chat):
+    # The seller is whichever participant posted the product, so both orders are matched.
+    participants = {chat.sent_by_id, chat.sent_to_id}
+    return Conversation.objects.filter(
+        product_id=chat.product_id_id, buyer_id__in=participants, seller_id__in=participants
+    )
+
+
+def record_messages(chats):
+    """Fold newly created ``chats``, whose products are loaded, into their conversations.
+
+    Each conversation costs one UPDATE, plus an INSERT for its first message.
+    """
+    threads = {}
+    for chat in sorted(chats, key=lambda chat: (chat.message_timing, chat.pk)):
+        seller_id = chat.product_id.posted_by_id
+        summary = threads.setdefault(thread_key(chat, seller_id), {"buyer_unread": 0, "seller_unread": 0})
+        summary["last_message"] = chat.message
+        summary["last_message_at"] = chat.message_timing
+        summary["seller_unread" if chat.sent_to_id == seller_id else "buyer_unread"] += 1
+
+    with transaction.atomic():
+        for (product_id, buyer_id, seller_id), summary in threads.items():
+            conversations = Conversation.objects.filter(product_id=product_id, buyer_id=buyer_id, seller_id=seller_id)
+            values = {
+                "last_message": summary["last_message"],
+                "last_message_at": summary["last_message_at"],
+                "buyer_unread": F("buyer_unread") + summary["buyer_unread"],
+                "seller_unread": F("seller_unread") + summary["seller_unread"],
+            }
+            if conversations.update(**values):
+                continue
+            try:
+                with transaction.atomic():
+                    Conversation.objects.create(product_id=product_id, buyer_id=buyer_id, seller_id=seller_id, **summary)
+            except IntegrityError:
+                # Another message started the conversation first.
+                conversations.update(**values)
+
+
+def record_update(chat):
+    # Only the latest message is shown in the summary.
+    thread_conversations(chat).filter(last_message_at=chat.message_timing).update(last_message=chat.message)
+
+
+def deleted_unread(remaining, deleted, unread):
+    """How many of the ``deleted`` messages to one participant were among their ``unread`` newest.
+
+    ``remaining`` holds the messages to them that are left.  Reading a thread
+    resets its count, so the unread messages are always the newest ones.
+    """
+    if not unread or not deleted:
+        return 0
+    newer = list(remaining.order_by("-message_timing", "-id").values_list("message_timing", "id")[:unread])
+    count = 0
+    for index, chat in enumerate(sorted(deleted, key=lambda chat: (chat.message_timing, chat.pk), reverse=True)):
+        if index + sum(1 for key in newer if key > (chat.message_timing, chat.pk)) < unread:
+            count += 1
+    return count
+
+
+def refresh(chats):
+    """Recompute the summary of the conversation after its messages ``chats`` were deleted."""
+    conversation = thread_conversations(chats[0]).first()
+    if conversation is None:
+        return
+    messages = Chat.objects.filter(
+        product_id=conversation.product_id,
+        sent_by__in=(conversation.buyer_id, conversation.seller_id),
+        sent_to__in=(conversation.buyer_id, conversation.seller_id),
+    )
+    latest = messages.order_by("-message_timing", "-id").first()
+    if latest is None:
+        conversation.delete()
+        return
+
+    values = {}
+    for field, recipient_id in (("buyer_unread", conversation.buyer_id), ("seller_unread", conversation.seller_id)):
+        count = deleted_unread(
+            messages.filter(sent_to=recipient_id),
+            [chat for chat in chats if chat.sent_to_id == recipient_id],
+            getattr(conversation, field),
+        )
+        if count:
+            # A concurrent read may have reset the count already.
+            values[field] = Greatest(F(field) - count, 0)
+    if (conversation.last_message, conversation.last_message_at) != (latest.message, latest.message_timing):
+        values["last_message"] = latest.message
+        values["last_message_at"] = latest.message_timing
+    if values:
+        Conversation.objects.filter(pk=conversation.pk).update(**values)
+
+
+def save_message(chat):
+    with transaction.atomic():
+        chat.save()
+        record_messages([chat])
+        stats.add_messages([chat])
+
+
+def update_message(chat):
+    with transaction.atomic():
+        chat.save(update_fields=["message"])
+        record_update(chat)
+
+
+def delete_message(chat):
+    with transaction.atomic():
+        # Deleted through a queryset so ``chat`` keeps its pk for ``refresh``.
+        Chat.objects.filter(pk=chat.pk).delete()
+        refresh([chat])
+        stats.remove_messages([chat])
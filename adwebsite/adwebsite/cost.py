@@ -0,0 +1,170 @@
+from django.conf import settings
+from graphql import GraphQLError, get_named_type, get_nullable_type, is_leaf_type, is_list_type
+from graphql.language import FieldNode, FragmentDefinitionNode, FragmentSpreadNode, IntValueNode, OperationDefinitionNode, VariableNode
+from graphql.validation import ValidationRule
+
+from adwebsite.pagination import max_page_size
+
+# Extra weight of fields that are more expensive than a plain relation.
+FIELD_WEIGHTS = {
+    "Query.listUsers": 5,
+    "Query.listProducts": 2,
+    "Query.listMessages": 2,
+    "Query.searchProducts": 3,
+    "Query.products": 2,
+    "Query.inbox": 2,
+    "Query.readProduct": 2,
+    "Query.readMessage": 2,
+    # Hash a password, which takes tens of milliseconds of CPU.
+    "Mutation.createUser": 20,
+    "Mutation.updateUser": 20,
+    # Write up to GRAPHQL_MAX_BULK_SIZE rows.
+    "Mutation.createProducts": 20,
+    "Mutation.updateProducts": 20,
+    "Mutation.deleteProducts": 20,
+    "Mutation.createMessages": 20,
+    "Mutation.updateMessages": 20,
+    "Mutation.deleteMessages": 20,
+}
+
+
+def max_cost():
+    return getattr(settings, "GRAPHQL_MAX_COST", 1000)
+
+
+def max_depth():
+    return getattr(settings, "GRAPHQL_MAX_DEPTH", 10)
+
+
+def field_weight(parent_type, field_name, field_type):
+    weight = FIELD_WEIGHTS.get(f"{parent_type.name}.{field_name}")
+    if weight is not None:
+        return weight
+    return 0 if is_leaf_type(get_named_type(field_type)) else 1
+
+
+def page_size(node, variables):
+    """Size of the page a paginated field asks for, or ``None`` if it is not paginated."""
+    for argument in node.arguments:
+        if argument.name.value != "first":
+            continue
+        value = argument.value
+        if isinstance(value, IntValueNode):
+            size = value.value
+        elif isinstance(value, VariableNode) and variables:
+            size = variables.get(value.name.value)
+        else:
+            size = None
+        try:
+            return max(0, min(int(size), max_page_size()))
+        except (TypeError, ValueError):
+            return max_page_size()
+    return None
+
+
+class Analysis:
+    """Static cost and depth of one operation.
+
+    Every object field costs its weight and scalars are free.  A list field
+    multiplies the cost of its selection by the page size requested through a
+    ``first`` argument on it or on the connection field above it, and by
+    ``GRAPHQL_MAX_PAGE_SIZE`` when the list is unbounded.  Introspection
+    fields are not counted.
+    """
+
+    def __init__(self, schema, fragments, variables=None):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+
+    def operation(self, operation):
+        root = self.schema.get_root_type(operation.operation)
+        if root is None:
+            return 0, 0
+        return self.selection_set(root, operation.selection_set, None, frozenset())
+
+    def selection_set(self, parent_type, selection_set, pending, seen):
+        cost, depth = 0, 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self.field(parent_type, selection, pending, seen)
+            else:
+                if isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    fragment = self.fragments.get(name)
+                    if fragment is None or name in seen:
+                        continue
+                    seen = seen | {name}
+                else:
+                    fragment = selection
+                type_condition = fragment.type_condition
+                fragment_type = self.schema.get_type(type_condition.name.value) if type_condition else parent_type
+                field_cost, field_depth = self.selection_set(fragment_type or parent_type, fragment.selection_set, pending, seen)
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return cost, depth
+
+    def field(self, parent_type, node, pending, seen):
+        name = node.name.value
+        if name.startswith("__"):
+            return 0, 0
+        field_def = getattr(parent_type, "fields", {}).get(name)
+        if field_def is None:
+            return 0, 1
+
+        weight = field_weight(parent_type, name, field_def.type)
+        requested = page_size(node, self.variables)
+        multiplier = 1
+        if is_list_type(get_nullable_type(field_def.type)):
+            for size in (requested, pending, max_page_size()):
+                if size is not None:
+                    multiplier = size
+                    break
+            pending = None
+        elif requested is not None:
+            # A connection: the page size applies to its ``edges`` list.
+            pending = requested
+
+        if node.selection_set is None:
+            return weight, 1
+        child_cost, child_depth = self.selection_set(get_named_type(field_def.type), node.selection_set, pending, seen)
+        return weight + multiplier * child_cost, child_depth + 1
+
+
+def document_fragments(document):
+    return {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+
+
+def operation_cost(schema, document, operation_name=None, variables=None):
+    """Return ``(cost, depth)`` of the operation ``operation_name`` in ``document``."""
+    operations = [
+        definition for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        and (operation_name is None or (definition.name and definition.name.value == operation_name))
+    ]
+    if not operations:
+        return 0, 0
+    return Analysis(schema, document_fragments(document), variables).operation(operations[0])
+
+
+class QueryCostRule(ValidationRule):
+    """Reject operations whose static cost or depth exceed the configured limits."""
+
+    def enter_operation_definition(self, node, *args):
+        fragments = document_fragments(self.context.document)
+        cost, depth = Analysis(self.context.schema, fragments).operation(node)
+        name = node.name.value if node.name else "anonymous"
+        if depth > max_depth():
+            self.report_error(GraphQLError(
+                f"Operation '{name}' has depth {depth}, which exceeds the maximum depth of {max_depth()}",
+                node, extensions={"code": "QUERY_TOO_DEEP", "depth": depth, "maxDepth": max_depth()},
+            ))
+        if cost > max_cost():
+            self.report_error(GraphQLError(
+                f"Operation '{name}' has cost {cost}, which exceeds the maximum cost of {max_cost()}",
+                node, extensions={"code": "QUERY_TOO_EXPENSIVE", "cost": cost, "maxCost": max_cost()},
+            ))
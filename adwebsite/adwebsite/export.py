@@ -0,0 +1,105 @@
+import csv
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from adwebsite.models import Chat, Product
+
+# Exportable tables: their model, the watermark column incremental exports
+# resume from, and the exported columns.
+TABLES = {
+    "products": (Product, "posted_on", ("id", "product_name", "product_description", "product_price", "posted_by", "posted_on")),
+    "chats": (Chat, "message_timing", ("id", "message", "sent_by", "sent_to", "product_id", "message_timing")),
+}
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def watermark_lag():
+    return getattr(settings, "EXPORT_WATERMARK_LAG", 60)
+
+
+def export_until(until=None):
+    """The end of an export window: ``until``, but never later than ``EXPORT_WATERMARK_LAG`` seconds ago.
+
+    posted_on and message_timing are set before their row commits, so a row
+    can become visible with a timestamp an export has already passed; the
+    lag gives such writes time to commit before a window covers them.
+    """
+    latest = timezone.now() - timedelta(seconds=watermark_lag())
+    return latest if until is None else min(until, latest)
+
+
+def parse_watermark(value):
+    if not value:
+        return None
+    watermark = datetime.fromisoformat(value)
+    return timezone.make_aware(watermark, dt_timezone.utc) if timezone.is_naive(watermark) else watermark
+
+
+def export_rows(table, since, until):
+    """Dicts of the ``table`` rows whose watermark is in ``[since, until)``, oldest first.
+
+    Consecutive exports passing the previous ``until`` as ``since`` neither
+    skip nor repeat rows. The (watermark, id) order is read from
+    product_recent_idx or chat_recent_idx.
+    """
+    model, watermark, fields = TABLES[table]
+    rows = model.objects.filter(**{f"{watermark}__lt": until})
+    if since is not None:
+        rows = rows.filter(**{f"{watermark}__gte": since})
+    return rows.order_by(watermark, "id").values(*fields)
+
+
+class Echo:
+    """File-like object handing back what ``csv.writer`` writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def encoder(table, format):
+    """Return the header and the row encoder of ``format``."""
+    fields = TABLES[table][2]
+    if format == "csv":
+        writer = csv.writer(Echo())
+        return writer.writerow(fields), lambda row: writer.writerow(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row.values()]
+        )
+    return "", lambda row: json.dumps(row, default=datetime.isoformat) + "\n"
+
+
+def stream(table, format, since, until):
+    """Yield the export as text, one chunk of rows at a time.
+
+    Rows are read through a server-side cursor, so memory use depends on
+    ``EXPORT_CHUNK_SIZE`` and not on the size of the table.
+    """
+    header, encode = encoder(table, format)
+    lines = [header]
+    for row in export_rows(table, since, until).iterator(chunk_size=chunk_size()):
+        lines.append(encode(row))
+        if len(lines) >= chunk_size():
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+async def astream(table, format, since, until):
+    """``stream`` for ASGI servers, which would otherwise read a sync iterator into a list first."""
+    header, encode = encoder(table, format)
+    lines = [header]
+    async for row in export_rows(table, since, until).aiterator(chunk_size=chunk_size()):
+        lines.append(encode(row))
+        if len(lines) >= chunk_size():
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
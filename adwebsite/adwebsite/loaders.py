@@ -0,0 +1,83 @@
+import asyncio
+
+from adwebsite.models import Product, User
+
+
+class ModelLoader:
+    """Per-request DataLoader for rows of a single model.
+
+    ``load`` returns a future and queues its key; every key queued while the
+    executor resolves sibling fields is fetched with one ``id__in`` query on
+    the next turn of the event loop.  Results, including misses, are cached
+    for the rest of the request.
+    """
+
+    def __init__(self, model, fields=None):
+        self.model = model
+        self.fields = fields
+        self.cache = {}
+        self.queue = []
+
+    def load(self, key):
+        loop = asyncio.get_running_loop()
+        if key is None:
+            future = loop.create_future()
+            future.set_result(None)
+            return future
+        key = int(key)
+        future = self.cache.get(key)
+        if future is None:
+            future = self.cache[key] = loop.create_future()
+            self.queue.append(key)
+            if len(self.queue) == 1:
+                loop.call_soon(lambda: loop.create_task(self.dispatch()))
+        return future
+
+    async def load_many(self, keys):
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    async def dispatch(self):
+        keys, self.queue = self.queue, []
+        try:
+            rows = self.model.objects.filter(pk__in=keys)
+            if self.fields:
+                rows = rows.only(*self.fields)
+            rows = {row.pk: row async for row in rows}
+        except Exception as e:
+            for key in keys:
+                self.cache.pop(key).set_exception(e)
+            return
+        for key in keys:
+            self.cache[key].set_result(rows.get(key))
+
+    def clear(self, key):
+        self.cache.pop(int(key), None)
+
+
+class Loaders:
+    def __init__(self):
+        # Related users are only exposed as PublicUser, so only its columns are read.
+        self.users = ModelLoader(User, fields=("id", "username"))
+        self.products = ModelLoader(Product)
+
+
+def get_loaders(info):
+    """Return the loaders attached to the current request, creating them once."""
+    context = info.context
+    if context is None:
+        return Loaders()
+    loaders = getattr(context, "loaders", None)
+    if loaders is None:
+        loaders = context.loaders = Loaders()
+    return loaders
+
+
+def load_related(instance, field, loader):
+    """Resolve the forward relation ``field`` of ``instance`` through ``loader``.
+
+    A relation already fetched with ``select_related`` is returned as is.
+    """
+    descriptor = getattr(type(instance), field)
+    if descriptor.is_cached(instance):
+        return getattr(instance, field)
+    return loader.load(getattr(instance, descriptor.field.attname))
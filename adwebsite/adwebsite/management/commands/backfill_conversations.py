@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from adwebsite.models import Chat, Conversation
+
+
+class Command(BaseCommand):
+    help = (
+        "Build Conversation rows from existing Chat rows. Safe to run again: "
+        "existing conversations get their last message refreshed and keep their unread counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Conversations written per query")
+
+    def handle(self, *args, **options):
+        seller = F("product_id__posted_by")
+        # The latest chat of every (product, buyer, seller) thread, in one DISTINCT ON query.
+        latest = (
+            Chat.objects.annotate(
+                seller=seller,
+                buyer=Case(When(sent_by=seller, then=F("sent_to")), default=F("sent_by")),
+            )
+            .order_by("product_id", "buyer", "seller", "-message_timing", "-id")
+            .distinct("product_id", "buyer", "seller")
+            .values_list("product_id", "buyer", "seller", "message", "message_timing")
+        )
+
+        written, batch = 0, []
+        for product_id, buyer_id, seller_id, message, message_timing in latest.iterator(chunk_size=options["batch_size"]):
+            batch.append(Conversation(
+                product_id=product_id,
+                buyer_id=buyer_id,
+                seller_id=seller_id,
+                last_message=message,
+                last_message_at=message_timing,
+            ))
+            if len(batch) >= options["batch_size"]:
+                written += self.write(batch)
+                batch = []
+        if batch:
+            written += self.write(batch)
+        self.stdout.write(f"Backfilled {written} conversations")
+
+    def write(self, batch):
+        with transaction.atomic():
+            Conversation.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["product", "buyer", "seller"],
+                update_fields=["last_message", "last_message_at"],
+            )
+        return len(batch)
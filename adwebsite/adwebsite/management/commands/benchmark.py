@@ -0,0 +1,210 @@
+import json
+import statistics
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+
+from adwebsite import tracing
+from adwebsite.models import Chat, Product, User
+from adwebsite.schema import schema
+
+# Representative operations, run in this order every iteration.  ``variables``
+# builds the arguments from the shared state and ``store`` keeps what later
+# operations need, so every mutation cleans up after the one before it.
+OPERATIONS = [
+    {
+        "name": "listProducts",
+        "query": "query($first: Int) { listProducts(first: $first) { edges { node { id productName productPrice postedOn postedBy { username } } } } }",
+        "variables": lambda state: {"first": 20},
+    },
+    {
+        "name": "readProduct",
+        "query": "query($userid: Int) { readProduct(userid: $userid) { id productName productPrice postedOn } }",
+        "variables": lambda state: {"userid": state["seller"]},
+    },
+    {
+        "name": "readMessage",
+        "query": "query($sentby: Int, $sentto: Int) { readMessage(sentby: $sentby, sentto: $sentto) { id message messageTiming productId { productName } } }",
+        "variables": lambda state: {"sentby": state["buyer"], "sentto": state["seller"]},
+    },
+    {
+        "name": "readThread",
+        "query": "query($sentby: Int, $sentto: Int) { readMessage(sentby: $sentby, sentto: $sentto) { id message messageTiming sentBy { username } sentTo { username } } }",
+        "variables": lambda state: {"sentby": state["buyer"], "sentto": state["seller"]},
+    },
+    {
+        "name": "inbox",
+        "query": "query($first: Int) { inbox(first: $first) { edges { node { id lastMessage unread product { productName } buyer { username } seller { username } } } } }",
+        "variables": lambda state: {"first": 20},
+    },
+    {
+        "name": "createUser",
+        "query": "mutation($username: String, $email: String, $password: String) { createUser(username: $username, email: $email, password: $password) { user { id } } }",
+        "variables": lambda state: {"username": f"bench-{state['run']}", "email": f"bench-{state['run']}@example.com", "password": "password"},
+        "store": lambda state, data: state.update(user=data["createUser"]["user"]["id"]),
+    },
+    {
+        "name": "updateUser",
+        "query": "mutation($id: ID, $username: String, $email: String, $password: String) { updateUser(id: $id, username: $username, email: $email, password: $password) { user { id } } }",
+        "variables": lambda state: {"id": state["user"], "username": f"bench-{state['run']}-renamed", "email": f"bench-{state['run']}-renamed@example.com", "password": "password"},
+    },
+    {
+        "name": "deleteUser",
+        "query": "mutation($id: ID) { deleteUser(id: $id) { user { username } } }",
+        "variables": lambda state: {"id": state["user"]},
+    },
+    {
+        "name": "createProduct",
+        "query": "mutation($by: Int) { createProduct(productName: \"Benchmark lamp\", productDescription: \"Brass desk lamp\", productPrice: 25, postedBy: $by) { product { id } } }",
+        "variables": lambda state: {"by": state["seller"]},
+        "store": lambda state, data: state.update(product=int(data["createProduct"]["product"]["id"])),
+    },
+    {
+        "name": "updateProduct",
+        "query": "mutation($id: Int, $by: Int) { updateProduct(productId: $id, productPrice: 30, postedBy: $by) { product { id productPrice } } }",
+        "variables": lambda state: {"id": state["product"], "by": state["seller"]},
+    },
+    {
+        "name": "createMessage",
+        "query": "mutation($by: Int, $to: Int, $product: Int) { createMessage(message: \"Is this still available?\", sentBy: $by, sentTo: $to, productId: $product) { message { id } } }",
+        "variables": lambda state: {"by": state["buyer"], "to": state["seller"], "product": state["product"]},
+        "store": lambda state, data: state.update(message=data["createMessage"]["message"]["id"]),
+    },
+    {
+        "name": "updateMessage",
+        "query": "mutation($id: ID, $by: Int, $product: Int) { updateMessage(id: $id, message: \"Is this still for sale?\", userId: $by, productId: $product) { chat { id } } }",
+        "variables": lambda state: {"id": state["message"], "by": state["buyer"], "product": state["product"]},
+    },
+    {
+        "name": "deleteMessage",
+        "query": "mutation($id: ID, $by: ID) { deleteMessage(id: $id, userId: $by) { chat { id } } }",
+        "variables": lambda state: {"id": state["message"], "by": state["buyer"]},
+    },
+    {
+        "name": "deleteProduct",
+        "query": "mutation($id: ID, $by: ID) { deleteProduct(id: $id, userId: $by) { product { id } } }",
+        "variables": lambda state: {"id": state["product"], "by": state["seller"]},
+    },
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run representative GraphQL operations in-process through schema.execute against the "
+        "current database and report latency, throughput and SQL counts. Seed data first with "
+        "`manage.py seed`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5, help="Iterations run before measuring")
+        parser.add_argument("--only", nargs="+", help="Operation names to run")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--baseline", help="Compare against results previously written with --output")
+        parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed p95 slowdown against the baseline")
+        parser.add_argument("--check", action="store_true", help="Fail when an operation regressed against the baseline")
+
+    def handle(self, *args, **options):
+        operations = [operation for operation in OPERATIONS if not options["only"] or operation["name"] in options["only"]]
+        if not operations:
+            raise CommandError(f"No operations selected; choose from {', '.join(o['name'] for o in OPERATIONS)}")
+
+        chat = Chat.objects.select_related("sent_to").order_by("id").first()
+        if chat is None:
+            raise CommandError("The database has no chats; run `manage.py seed` first")
+        state = {"buyer": chat.sent_by_id, "seller": chat.sent_to_id}
+        # Operations run as the seller of the first chat, so the inbox has threads in it.
+        viewer = chat.sent_to
+
+        timings = {operation["name"]: [] for operation in operations}
+        queries = {operation["name"]: [] for operation in operations}
+        started = time.perf_counter()
+        for run in range(options["warmup"] + options["iterations"]):
+            state["run"] = f"{int(started)}-{run}"
+            for operation in operations:
+                duration, count = self.run_operation(operation, state, viewer)
+                if run >= options["warmup"]:
+                    timings[operation["name"]].append(duration)
+                    queries[operation["name"]].append(count)
+
+        results = {
+            "dataset": {"users": User.objects.count(), "products": Product.objects.count(), "chats": Chat.objects.count()},
+            "iterations": options["iterations"],
+            "operations": {
+                name: {
+                    "p50": statistics.median(values) * 1000,
+                    "p95": percentile(values, 0.95) * 1000,
+                    "p99": percentile(values, 0.99) * 1000,
+                    "throughput": len(values) / sum(values),
+                    "queries": statistics.mean(queries[name]),
+                }
+                for name, values in timings.items()
+            },
+        }
+        self.report(results)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                regressions = self.compare(results, json.load(f), options["tolerance"])
+            if regressions and options["check"]:
+                raise CommandError(f"Slower than the baseline: {', '.join(regressions)}")
+
+    def run_operation(self, operation, state, viewer):
+        # Each operation gets its own context, as a request would, so DataLoaders
+        # are not shared across event loops.  The trace counts its SQL.
+        context = SimpleNamespace(user=viewer)
+        trace = tracing.Trace(operation["name"])
+        token = tracing.current_trace.set(trace)
+        try:
+            started = time.perf_counter()
+            result = async_to_sync(schema.execute_async)(
+                operation["query"], variable_values=operation["variables"](state), context_value=context
+            )
+            duration = time.perf_counter() - started
+        finally:
+            tracing.current_trace.reset(token)
+        if result.errors:
+            raise CommandError(f"{operation['name']} failed: {result.errors[0]}")
+        if "store" in operation:
+            operation["store"](state, result.data)
+        return duration, trace.query_count
+
+    def report(self, results):
+        dataset = results["dataset"]
+        self.stdout.write(
+            f"{dataset['users']} users, {dataset['products']} products, {dataset['chats']} chats; "
+            f"{results['iterations']} iterations"
+        )
+        self.stdout.write(f"{'operation':<15} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ops/s':>8} {'queries':>8}")
+        for name, stats in results["operations"].items():
+            self.stdout.write(
+                f"{name:<15} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} "
+                f"{stats['throughput']:>8.1f} {stats['queries']:>8.1f}"
+            )
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        self.stdout.write(f"\n{'operation':<15} {'p95 ms':>8} {'baseline':>8} {'change':>8} {'queries':>8} {'baseline':>8}")
+        for name, stats in results["operations"].items():
+            before = baseline.get("operations", {}).get(name)
+            if before is None:
+                continue
+            change = stats["p95"] / before["p95"] - 1 if before["p95"] else 0.0
+            regressed = change > tolerance or stats["queries"] > before["queries"]
+            if regressed:
+                regressions.append(name)
+            self.stdout.write(
+                f"{name:<15} {stats['p95']:>8.2f} {before['p95']:>8.2f} {change:>+8.1%} "
+                f"{stats['queries']:>8.1f} {before['queries']:>8.1f}{'  REGRESSED' if regressed else ''}"
+            )
+        return regressions
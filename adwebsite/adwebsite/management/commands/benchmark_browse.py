@@ -0,0 +1,80 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from adwebsite.browse import ORDERS, browse_products, product_order
+from adwebsite.models import Product
+
+
+def plan_nodes(node):
+    """Yield ``"Node Type (index)"`` for every node of an EXPLAIN (FORMAT JSON) plan."""
+    index = node.get("Index Name")
+    yield f"{node['Node Type']} ({index})" if index else node["Node Type"]
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the first page of the products query for every supported filter and "
+        "orderBy combination, and report the plan the database picks for it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per combination")
+        parser.add_argument("--first", type=int, default=20, help="Page size")
+
+    def handle(self, *args, **options):
+        first = options["first"]
+        prices = Product.objects.aggregate(low=Min("product_price"), high=Max("product_price"))
+        seller = Product.objects.values_list("posted_by", flat=True).order_by("?").first()
+        low, high = prices["low"] or 0, prices["high"] or 0
+        filters = {
+            "none": {},
+            "price range": {"price_min": low + (high - low) // 4, "price_max": high - (high - low) // 4},
+            "price max": {"price_max": low + (high - low) // 10},
+            "seller": {"posted_by": seller},
+            "seller since": {"posted_by": seller, "posted_since": timezone.now() - timedelta(days=30)},
+            "since": {"posted_since": timezone.now() - timedelta(days=7)},
+            "price range since": {
+                "price_min": low + (high - low) // 4,
+                "price_max": high - (high - low) // 4,
+                "posted_since": timezone.now() - timedelta(days=7),
+            },
+        }
+        # One orderBy per distinct keyset; the other spellings run the same SQL.
+        orders = {ORDERS[keys]: keys for keys in ORDERS if keys}
+
+        self.stdout.write(f"{Product.objects.count()} products, {options['repeat']} runs each")
+        for filter_name, arguments in filters.items():
+            for keys in orders.values():
+                order_fields, _, descending = product_order(keys)
+                sign = "-" if descending else ""
+                queryset = browse_products(Product.objects.all(), **arguments).order_by(
+                    *(f"{sign}{field}" for field in (*order_fields, "id"))
+                )[:first + 1]
+
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    rows = len(list(queryset.all()))
+                    timings.append((time.perf_counter() - started) * 1000)
+
+                with connection.cursor() as cursor:
+                    sql, params = queryset.query.sql_with_params()
+                    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                    explained = cursor.fetchone()[0]
+                if isinstance(explained, str):
+                    explained = json.loads(explained)
+                nodes = [node for node in plan_nodes(explained[0]["Plan"]) if node != "Limit"]
+
+                self.stdout.write(
+                    f"{filter_name:<18} {','.join(keys):<26} rows={rows:<3} "
+                    f"p50={statistics.median(timings):.2f} ms  {' > '.join(nodes)}"
+                )
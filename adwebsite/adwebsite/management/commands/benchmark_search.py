@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from adwebsite.models import Product
+from adwebsite.search import search_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the first page of a product search through the tsvector index "
+        "against the equivalent icontains scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("query", help="Search text, e.g. 'bike'")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per strategy")
+        parser.add_argument("--first", type=int, default=20, help="Page size")
+        parser.add_argument("--explain", action="store_true", help="Print the query plans")
+
+    def handle(self, *args, **options):
+        text, first = options["query"], options["first"]
+        strategies = {
+            "tsvector": search_products(Product.objects.all(), text).order_by("-rank", "-id")[:first],
+            "icontains": Product.objects.filter(
+                Q(product_name__icontains=text) | Q(product_description__icontains=text)
+            ).order_by("-posted_on", "-id")[:first],
+        }
+
+        self.stdout.write(f"{Product.objects.count()} products, {options['repeat']} runs each")
+        for name, queryset in strategies.items():
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                rows = len(list(queryset.all()))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{name:<10} rows={rows:<4} mean={statistics.mean(timings):.2f} ms "
+                f"p50={statistics.median(timings):.2f} ms max={max(timings):.2f} ms"
+            )
+            if options["explain"]:
+                with connection.cursor() as cursor:
+                    sql, params = queryset.query.sql_with_params()
+                    cursor.execute(f"EXPLAIN ANALYZE {sql}", params)
+                    for (line,) in cursor.fetchall():
+                        self.stdout.write(f"    {line}")
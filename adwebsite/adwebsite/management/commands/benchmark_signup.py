@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+
+from adwebsite import passwords
+from adwebsite.models import User
+from adwebsite.schema import schema
+
+SIGNUP = "mutation($username: String, $email: String, $password: String) { createUser(username: $username, email: $email, password: $password) { user { id } } }"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password hashing throughput per hasher through the hashing pool, then "
+        "createUser signups per second with the configured PASSWORD_HASHER."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hasher", nargs="+", default=["argon2", "bcrypt_sha256", "pbkdf2_sha256"], help="Hasher algorithms to time")
+        parser.add_argument("--count", type=int, default=50, help="Passwords hashed per hasher")
+        parser.add_argument("--signups", type=int, default=50, help="createUser mutations to run; 0 skips them")
+        parser.add_argument("--concurrency", type=int, default=16, help="Hashes or signups in flight at once")
+
+    def handle(self, *args, **options):
+        threads = passwords.hashing_threads()
+        cores = min(threads, os.cpu_count() or 1)
+        self.stdout.write(f"{threads} hashing threads on {os.cpu_count()} cores, concurrency {options['concurrency']}")
+
+        for algorithm in options["hasher"]:
+            try:
+                hasher = get_hasher(algorithm)
+            except ValueError:
+                raise CommandError(f"{algorithm} is not in PASSWORD_HASHERS")
+            elapsed = asyncio.run(self.hash_passwords(hasher, options["count"], options["concurrency"]))
+            self.report(algorithm, options["count"], elapsed, cores)
+
+        if options["signups"]:
+            viewer = User.objects.filter(is_superuser=True).first()
+            prefix = f"signup-{int(time.time())}"
+            try:
+                elapsed = asyncio.run(self.sign_up(prefix, options["signups"], options["concurrency"], viewer))
+                self.report(f"createUser ({settings.PASSWORD_HASHER})", options["signups"], elapsed, cores)
+            finally:
+                User.objects.filter(username__startswith=prefix).delete()
+
+    async def hash_passwords(self, hasher, count, concurrency):
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with limit:
+                await loop.run_in_executor(passwords.executor(), hasher.encode, f"password-{i}", hasher.salt())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        return time.perf_counter() - started
+
+    async def sign_up(self, prefix, count, concurrency, viewer):
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with limit:
+                result = await schema.execute_async(
+                    SIGNUP,
+                    variable_values={"username": f"{prefix}-{i}", "email": f"{prefix}-{i}@example.com", "password": f"password-{i}"},
+                    context_value=SimpleNamespace(user=viewer),
+                )
+            if result.errors:
+                raise CommandError(f"createUser failed: {result.errors[0]}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        return time.perf_counter() - started
+
+    def report(self, name, count, elapsed, cores):
+        rate = count / elapsed
+        self.stdout.write(
+            f"{name:<24} {count} in {elapsed:.2f} s  {rate:.1f}/s  {rate / cores:.1f}/s per core  "
+            f"{elapsed / count * 1000:.1f} ms each"
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from adwebsite.export import FORMATS, TABLES, export_until, parse_watermark, stream
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products or chats as NDJSON or CSV. Pass the watermark printed by the "
+        "previous run as --since to export only the rows added since."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=sorted(TABLES))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+        parser.add_argument("--since", help="Export rows from this ISO 8601 timestamp on")
+        parser.add_argument("--until", help="Export rows before this ISO 8601 timestamp (default and latest: EXPORT_WATERMARK_LAG seconds ago)")
+        parser.add_argument("--output", help="File to write to instead of stdout")
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_watermark(options["since"])
+            until = export_until(parse_watermark(options["until"]))
+        except ValueError:
+            raise CommandError("--since and --until must be ISO 8601 timestamps")
+
+        chunks = stream(options["table"], options["format"], since, until)
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+        self.stderr.write(f"Exported up to {until.isoformat()}; pass it as --since to continue from there")
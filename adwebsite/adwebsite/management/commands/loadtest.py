@@ -0,0 +1,53 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from adwebsite.query import get_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent GraphQL requests to a running server and report throughput "
+        "and latency, e.g. to compare the WSGI and ASGI deployments. All requests come from "
+        "one client, so run the server with RATELIMIT_ENABLED=False."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="GraphQL endpoint, e.g. http://127.0.0.1:8000/graphql")
+        parser.add_argument("--query", default=get_products(), help="Operation to send (default: the home page listing)")
+        parser.add_argument("--requests", type=int, default=1000, help="Total number of requests")
+        parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once")
+        parser.add_argument("--session", help="sessionid cookie of a logged-in user")
+
+    def handle(self, *args, **options):
+        cookies = {"sessionid": options["session"]} if options["session"] else {}
+        body = json.dumps({"query": options["query"]})
+
+        def send(_):
+            with requests.Session() as session:
+                started = time.perf_counter()
+                response = session.post(
+                    options["url"], data=body, cookies=cookies,
+                    headers={"Content-Type": "application/json"},
+                )
+                return time.perf_counter() - started, response.status_code == 200 and "errors" not in response.json()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            results = list(pool.map(send, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        failures = sum(1 for _, ok in results if not ok)
+        if not latencies:
+            raise CommandError("No requests were sent")
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(f"requests:    {len(results)} ({failures} failed)")
+        self.stdout.write(f"throughput:  {len(results) / elapsed:.1f} req/s")
+        self.stdout.write(f"latency p50: {percentiles[49] * 1000:.1f} ms")
+        self.stdout.write(f"latency p95: {percentiles[94] * 1000:.1f} ms")
+        self.stdout.write(f"latency p99: {percentiles[98] * 1000:.1f} ms")
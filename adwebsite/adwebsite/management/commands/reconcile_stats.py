@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from adwebsite import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the seller and product statistics from the products and chats. "
+        "Writes that count wait for the rebuild and are applied on top of it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Counter rows written per query")
+
+    def handle(self, *args, **options):
+        sellers, products = stats.rebuild(options["batch_size"])
+        self.stdout.write(f"Rebuilt statistics of {sellers} sellers and {products} products")
@@ -0,0 +1,86 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from adwebsite.models import Chat, Product, User
+
+WORDS = (
+    "bike table chair lamp sofa guitar phone laptop camera desk shelf rug mirror kettle "
+    "oven tent kayak drill ladder piano vintage oak steel leather red blue new used small large"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic dataset of users, products and chats with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--chats", type=int, default=50000)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, so the same options give the same data")
+        parser.add_argument("--prefix", default="seed", help="Prefix of the generated usernames")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=90, help="Spread timestamps over this many days")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size, prefix = options["batch_size"], options["prefix"]
+        started = now()
+        window = timedelta(days=options["days"]).total_seconds()
+
+        def timestamp():
+            return started - timedelta(seconds=rng.random() * window)
+
+        def text(words):
+            return " ".join(rng.choices(WORDS, k=words))
+
+        # Hashing is deliberately slow, so every seeded user shares one hash of "password".
+        password = make_password("password")
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                [
+                    User(username=f"{prefix}-{i}", email=f"{prefix}-{i}@example.com", password=password)
+                    for i in range(options["users"])
+                ],
+                batch_size=batch_size,
+            )
+            user_ids = [user.id for user in users]
+
+            products = Product.objects.bulk_create(
+                [
+                    Product(
+                        product_name=text(3).capitalize(),
+                        product_description=text(20),
+                        product_price=rng.randint(1, 5000),
+                        posted_by_id=rng.choice(user_ids),
+                        posted_on=timestamp(),
+                    )
+                    for _ in range(options["products"])
+                ],
+                batch_size=batch_size,
+            )
+
+            chats = []
+            if len(user_ids) > 1 and products:
+                for _ in range(options["chats"]):
+                    product = rng.choice(products)
+                    buyer = rng.choice(user_ids)
+                    while buyer == product.posted_by_id:
+                        buyer = rng.choice(user_ids)
+                    chats.append(Chat(
+                        message=text(8),
+                        sent_by_id=buyer,
+                        sent_to_id=product.posted_by_id,
+                        product_id=product,
+                        message_timing=timestamp(),
+                    ))
+                Chat.objects.bulk_create(chats, batch_size=batch_size)
+
+        self.stdout.write(f"Seeded {len(users)} users, {len(products)} products and {len(chats)} chats")
+        call_command("backfill_conversations", batch_size=batch_size, stdout=self.stdout)
+        call_command("reconcile_stats", batch_size=batch_size, stdout=self.stdout)
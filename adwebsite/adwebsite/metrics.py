@@ -0,0 +1,149 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def max_operations():
+    return getattr(settings, "GRAPHQL_METRICS_MAX_OPERATIONS", 200)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), self.counts):
+            cumulative += count
+            yield f"{name}_bucket{format_labels((*labels, ('le', bound)))} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {self.sum}"
+        yield f"{name}_count{format_labels(labels)} {cumulative}"
+
+
+class Registry:
+    """Metrics of this worker process, rendered in the Prometheus text format.
+
+    Operation names come from clients, so only the first
+    ``GRAPHQL_METRICS_MAX_OPERATIONS`` distinct names get their own series;
+    later ones are counted as ``other``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = set()
+        self.durations = defaultdict(Histogram)
+        self.db_durations = defaultdict(Histogram)
+        self.queries = defaultdict(int)
+        self.results = defaultdict(int)
+        self.resolver_time = defaultdict(float)
+        self.resolver_calls = defaultdict(int)
+
+    def operation_label(self, name):
+        if name not in self.operations:
+            if len(self.operations) >= max_operations():
+                return "other"
+            self.operations.add(name)
+        return name
+
+    def record(self, trace):
+        with self.lock:
+            operation = self.operation_label(trace.operation)
+            self.durations[operation].observe(trace.duration)
+            self.db_durations[operation].observe(trace.db_time)
+            self.queries[operation] += trace.query_count
+            self.results[operation, "error" if trace.failed else "ok"] += 1
+            for field, (duration, calls) in trace.fields.items():
+                self.resolver_time[field] += duration
+                self.resolver_calls[field] += calls
+
+    def render(self, extra=()):
+        with self.lock:
+            lines = [
+                "# HELP graphql_operation_duration_seconds Wall time of GraphQL operations.",
+                "# TYPE graphql_operation_duration_seconds histogram",
+            ]
+            for operation, histogram in sorted(self.durations.items()):
+                lines.extend(histogram.lines("graphql_operation_duration_seconds", (("operation", operation),)))
+            lines += [
+                "# HELP graphql_operation_db_seconds Time spent in SQL per GraphQL operation.",
+                "# TYPE graphql_operation_db_seconds histogram",
+            ]
+            for operation, histogram in sorted(self.db_durations.items()):
+                lines.extend(histogram.lines("graphql_operation_db_seconds", (("operation", operation),)))
+            lines += [
+                "# HELP graphql_operation_queries_total SQL queries run by GraphQL operations.",
+                "# TYPE graphql_operation_queries_total counter",
+            ]
+            for operation, count in sorted(self.queries.items()):
+                lines.append(f"graphql_operation_queries_total{format_labels((('operation', operation),))} {count}")
+            lines += [
+                "# HELP graphql_operations_total GraphQL operations by outcome.",
+                "# TYPE graphql_operations_total counter",
+            ]
+            for (operation, status), count in sorted(self.results.items()):
+                lines.append(f"graphql_operations_total{format_labels((('operation', operation), ('status', status)))} {count}")
+            lines += [
+                "# HELP graphql_resolver_seconds Time spent in resolvers, per schema field.",
+                "# TYPE graphql_resolver_seconds summary",
+            ]
+            for field, total in sorted(self.resolver_time.items()):
+                labels = format_labels((("field", field),))
+                lines.append(f"graphql_resolver_seconds_sum{labels} {total}")
+                lines.append(f"graphql_resolver_seconds_count{labels} {self.resolver_calls[field]}")
+        for name, kind, help, value in extra:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            # A dict value holds one sample per label set.
+            samples = value.items() if isinstance(value, dict) else [((), value)]
+            lines.extend(f"{name}{format_labels(labels)} {sample}" for labels, sample in samples)
+        return "\n".join(lines) + "\n"
+
+
+# psycopg_pool statistics exported when the database uses a connection pool:
+# (stat, metric, type, help, scale). The pool reports times in milliseconds.
+POOL_STATS = (
+    ("pool_max", "db_pool_max_connections", "gauge", "Largest size the connection pool may grow to.", 1),
+    ("pool_size", "db_pool_connections", "gauge", "Connections opened by the pool, in use or idle.", 1),
+    ("pool_available", "db_pool_available_connections", "gauge", "Idle connections ready in the pool.", 1),
+    ("requests_waiting", "db_pool_waiting_requests", "gauge", "Requests currently waiting for a connection.", 1),
+    ("requests_num", "db_pool_requests_total", "counter", "Connections requested from the pool.", 1),
+    ("requests_queued", "db_pool_queued_requests_total", "counter", "Requests that had to wait for a connection.", 1),
+    ("requests_wait_ms", "db_pool_wait_seconds_total", "counter", "Time requests spent waiting for a connection.", 0.001),
+    ("requests_errors", "db_pool_timeouts_total", "counter", "Requests that gave up waiting for a connection.", 1),
+    ("returns_bad", "db_pool_bad_returns_total", "counter", "Connections returned broken or mid-transaction.", 1),
+    ("connections_num", "db_pool_connects_total", "counter", "Connections opened to the database.", 1),
+    ("connections_ms", "db_pool_connect_seconds_total", "counter", "Time spent opening connections.", 0.001),
+    ("connections_lost", "db_pool_lost_connections_total", "counter", "Connections found broken by health checks.", 1),
+)
+
+
+def pool_metrics():
+    """Statistics of this worker's database connection pool, as extra metrics for ``Registry.render``."""
+    pool = getattr(connections["default"], "pool", None)
+    if pool is None:
+        return []
+    stats = pool.get_stats()
+    return [(name, kind, help, stats.get(stat, 0) * scale) for stat, name, kind, help, scale in POOL_STATS]
+
+
+registry = Registry()
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['sent_by', 'sent_to', 'message_timing'], name='chat_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['message_timing', 'id'], name='chat_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['posted_by', 'posted_on'], name='product_seller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['posted_on', 'id'], name='product_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0003_product_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message', models.CharField(max_length=500)),
+                ('last_message_at', models.DateTimeField()),
+                ('buyer_unread', models.PositiveIntegerField(default=0)),
+                ('seller_unread', models.PositiveIntegerField(default=0)),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='adwebsite.product')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['buyer', 'last_message_at', 'id'], name='conversation_buyer_idx'), models.Index(fields=['seller', 'last_message_at', 'id'], name='conversation_seller_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'buyer', 'seller'), name='conversation_thread_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def check_orphaned_chats(apps, schema_editor):
+    # Chats of deleted senders were never cascaded; the foreign key would reject them.
+    # Whether to delete or reassign them is left to whoever runs the migration.
+    Chat = apps.get_model('adwebsite', 'Chat')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    orphans = Chat.objects.exclude(sent_by__in=User.objects.values('id')).order_by('id')
+    count = orphans.count()
+    if count:
+        ids = ", ".join(str(id) for id in orphans.values_list('id', flat=True)[:100])
+        raise Exception(
+            f"{count} chats have a sent_by user that no longer exists (ids: {ids}{', ...' if count > 100 else ''}). "
+            "Delete them or point sent_by at an existing user, then run the migration again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0004_conversation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_orphaned_chats, migrations.RunPython.noop),
+        # The column keeps its name and values; only its constraint changes.
+        migrations.AlterField(
+            model_name='chat',
+            name='sent_by',
+            field=models.ForeignKey(db_column='sent_by', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sent_chats', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
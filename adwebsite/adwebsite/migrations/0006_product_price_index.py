@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0005_chat_sent_by_fk'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['product_price', 'posted_on', 'id'], name='product_price_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing(apps, schema_editor):
+    # Start the counters from the current rows; the mutations keep them up to date from here.
+    Chat = apps.get_model('adwebsite', 'Chat')
+    Product = apps.get_model('adwebsite', 'Product')
+    ProductStats = apps.get_model('adwebsite', 'ProductStats')
+    SellerStats = apps.get_model('adwebsite', 'SellerStats')
+    messages = Chat.objects.values_list('product_id').annotate(Count('id')).order_by()
+    ProductStats.objects.bulk_create(
+        [ProductStats(product_id=product_id, message_count=count) for product_id, count in messages.iterator()],
+        batch_size=1000,
+    )
+    seller_messages = dict(Chat.objects.values_list('product_id__posted_by').annotate(Count('id')).order_by())
+    products = Product.objects.values_list('posted_by').annotate(Count('id')).order_by()
+    SellerStats.objects.bulk_create(
+        [
+            SellerStats(seller_id=seller_id, product_count=count, message_count=seller_messages.get(seller_id, 0))
+            for seller_id, count in products.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0006_product_price_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='adwebsite.product')),
+                ('message_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SellerStats',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
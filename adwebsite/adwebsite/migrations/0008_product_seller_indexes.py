@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0007_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_seller_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['posted_by', 'posted_on', 'id'], name='product_seller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['posted_by', 'product_price', 'posted_on', 'id'], name='product_seller_price_idx'),
+        ),
+    ]
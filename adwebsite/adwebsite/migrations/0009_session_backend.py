@@ -0,0 +1,37 @@
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import migrations
+from django.utils import timezone
+
+OLD_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+NEW_BACKEND = 'adwebsite.auth.CachedModelBackend'
+
+
+def rename_session_backend(apps, schema_editor):
+    # Sessions name the backend that logged them in, and only listed backends
+    # resolve; rewrite the ones from before CachedModelBackend so they stay logged in.
+    Session = apps.get_model('sessions', 'Session')
+    store = SessionStore()
+    changed = []
+    for session in Session.objects.filter(expire_date__gt=timezone.now()).iterator(chunk_size=1000):
+        data = store.decode(session.session_data)
+        if data.get('_auth_user_backend') != OLD_BACKEND:
+            continue
+        data['_auth_user_backend'] = NEW_BACKEND
+        session.session_data = store.encode(data)
+        changed.append(session)
+        if len(changed) >= 1000:
+            Session.objects.bulk_update(changed, ['session_data'])
+            changed = []
+    Session.objects.bulk_update(changed, ['session_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adwebsite', '0008_product_seller_indexes'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_session_backend, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,100 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.timezone import now
 
+# Text search configuration used to build and query Product.search_vector.
+SEARCH_CONFIG = "english"
+
+class ProductManager(models.Manager):
+    def get_queryset(self):
+        # The search vector is only read by the database; don't ship it with every row.
+        return super().get_queryset().defer("search_vector")
+
 class Product(models.Model):
     product_name = models.CharField(max_length=100, null=False)
     product_description = models.CharField(max_length=250)
     product_price = models.IntegerField(null=False)
-    posted_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    # product_seller_idx leads with posted_by, so the foreign key needs no index of its own.
+    posted_by = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     posted_on = models.DateTimeField(default=now, editable=False)
+    search_vector = models.GeneratedField(
+        expression=SearchVector("product_name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("product_description", weight="B", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = ProductManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["posted_by", "posted_on", "id"], name="product_seller_idx"),
+            models.Index(fields=["posted_by", "product_price", "posted_on", "id"], name="product_seller_price_idx"),
+            models.Index(fields=["posted_on", "id"], name="product_recent_idx"),
+            models.Index(fields=["product_price", "posted_on", "id"], name="product_price_idx"),
+            GinIndex(fields=["search_vector"], name="product_search_idx"),
+        ]
+
     def __str__(self):
         return self.product_name
     
 class Chat(models.Model):
     message = models.CharField(max_length=500, null=False)
-    sent_by = models.IntegerField(null=False)
+    # chat_thread_idx leads with sent_by, so the foreign key needs no index of its own.
+    sent_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sent_chats", db_column="sent_by", db_index=False)
+    # No composite leads with sent_to; its own index serves the recipient side of
+    # sellerStats and the cascade when a user is deleted.
     sent_to = models.ForeignKey(User, on_delete=models.CASCADE)
     product_id = models.ForeignKey(Product, on_delete=models.CASCADE)
     message_timing = models.DateTimeField(default=now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sent_by", "sent_to", "message_timing"], name="chat_thread_idx"),
+            models.Index(fields=["message_timing", "id"], name="chat_recent_idx"),
+        ]
+
+    def __str__(self):
+        return self.message
+
+class Conversation(models.Model):
+    """Summary of the messages exchanged between a buyer and the seller of a product."""
+    # conversation_thread_unique and the inbox indexes lead with these, so the foreign keys need no index of their own.
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_index=False)
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_index=False)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_index=False)
+    last_message = models.CharField(max_length=500)
+    last_message_at = models.DateTimeField()
+    buyer_unread = models.PositiveIntegerField(default=0)
+    seller_unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "buyer", "seller"], name="conversation_thread_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["buyer", "last_message_at", "id"], name="conversation_buyer_idx"),
+            models.Index(fields=["seller", "last_message_at", "id"], name="conversation_seller_idx"),
+        ]
+
+    def __str__(self):
+        return self.last_message
+
+class SellerStats(models.Model):
+    """Running totals of a seller's ads and of the messages about them, kept by adwebsite.stats."""
+    seller = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    product_count = models.PositiveIntegerField(default=0)
+    message_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.seller_id}: {self.product_count} products, {self.message_count} messages"
+
+class ProductStats(models.Model):
+    """Running total of the messages about a product, kept by adwebsite.stats."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    message_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
-        return self.message
\ No newline at end of file
+        return f"{self.product_id}: {self.message_count} messages"
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import graphene
+from django.conf import settings
+from django.db.models import Q
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+
+
+def max_page_size():
+    return getattr(settings, "GRAPHQL_MAX_PAGE_SIZE", 100)
+
+
+def encode_cursor(values, pk):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64("|".join(str(value) for value in (*values, pk)))
+
+
+def decode_cursor(cursor, parse_values):
+    try:
+        *values, pk = unbase64(cursor).split("|")
+        if len(values) != len(parse_values):
+            raise ValueError(cursor)
+        return [parse(value) for parse, value in zip(parse_values, values)], int(pk)
+    except (ValueError, TypeError):
+        raise GraphQLError(f"Invalid cursor: {cursor}")
+
+
+def after_cursor(order_fields, values, pk, descending):
+    """Keyset filter for the rows that follow ``(*values, pk)`` in ``(*order_fields, id)`` order."""
+    lookup = "lt" if descending else "gt"
+    keys = [*zip(order_fields, values), ("id", pk)]
+    condition = Q()
+    for i, (field, value) in enumerate(keys):
+        condition |= Q(**dict(keys[:i]), **{f"{field}__{lookup}": value})
+    # The bound on the leading column alone lets the database seek the index to the cursor.
+    field, value = keys[0]
+    return Q(**{f"{field}__{lookup}e": value}) & condition
+
+
+class CountableConnection(graphene.relay.Connection):
+    """Relay connection whose ``totalCount`` is only queried when selected."""
+
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int()
+
+    def resolve_total_count(root, info):
+        return root.queryset.acount()
+
+
+async def paginate(connection_type, queryset, order_field, first=None, after=None, parse_value=datetime.fromisoformat, descending=True):
+    """Return one page of ``queryset`` as ``connection_type``.
+
+    Rows are ordered newest first on ``(order_field, id)`` and the ``after``
+    cursor is applied as a keyset filter, so every page costs a single
+    indexed query regardless of how deep the client has paged.
+    ``parse_value`` turns the cursor text back into an ``order_field`` value.
+    ``order_field`` and ``parse_value`` may also be tuples, to order on
+    several columns; ``descending=False`` reverses the order.
+    """
+    limit = max_page_size()
+    if first is None:
+        first = limit
+    if first < 0:
+        raise GraphQLError("Argument 'first' must be a non-negative integer")
+    first = min(first, limit)
+
+    order_fields = (order_field,) if isinstance(order_field, str) else tuple(order_field)
+    parse_values = (parse_value,) if callable(parse_value) else tuple(parse_value)
+    sign = "-" if descending else ""
+    page = queryset.order_by(*(f"{sign}{field}" for field in (*order_fields, "id")))
+    if after:
+        values, pk = decode_cursor(after, parse_values)
+        page = page.filter(after_cursor(order_fields, values, pk, descending))
+
+    rows = [row async for row in page[:first + 1]]
+    has_next_page = len(rows) > first
+    rows = rows[:first]
+
+    edges = [
+        connection_type.Edge(
+            node=row, cursor=encode_cursor([getattr(row, field) for field in order_fields], row.pk)
+        )
+        for row in rows
+    ]
+    connection = connection_type(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=bool(after),
+            has_next_page=has_next_page,
+        ),
+    )
+    connection.queryset = queryset
+    return connection
@@ -0,0 +1,51 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 with its costs taken from settings, so they can be tuned per deployment.
+
+    Stored hashes with other costs are updated at login.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+def hashing_threads():
+    return getattr(settings, "PASSWORD_HASHING_THREADS", 0) or os.cpu_count() or 1
+
+
+_executor = None
+
+
+def executor():
+    # The hashers release the GIL while hashing, so threads run them on every core.
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=hashing_threads(), thread_name_prefix="password-hashing")
+    return _executor
+
+
+async def amake_password(password):
+    """``make_password`` run in the hashing pool, so the event loop keeps serving requests."""
+    return await asyncio.get_running_loop().run_in_executor(executor(), hashers.make_password, password)
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class PersistedQueryError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class DocumentCache:
+    """Thread-safe LRU cache of parsed and validated documents keyed by sha256."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.documents = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            document = self.documents.get(key)
+            if document is None:
+                self.misses += 1
+                return None
+            self.documents.move_to_end(key)
+            self.hits += 1
+            return document
+
+    def put(self, key, document):
+        with self.lock:
+            self.documents[key] = document
+            self.documents.move_to_end(key)
+            while len(self.documents) > self.max_size:
+                self.documents.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.documents)}
+
+
+def load_allowlist(path):
+    """Read a JSON list of query documents and index them by hash."""
+    if not path:
+        return None
+    with open(path) as allowlist:
+        return {query_hash(query): query for query in json.load(allowlist)}
+
+
+def resolve(query, key):
+    """Return ``(hash, query)`` for a request, enforcing the persisted query rules.
+
+    ``key`` is the sha256 hash sent in the ``persistedQuery`` extension, if any.
+    The returned query is ``None`` when only the hash was sent and the caller
+    has to find the document in the cache or the allowlist.
+    """
+    if query:
+        if key is not None and key != query_hash(query):
+            raise PersistedQueryError("provided sha does not match query", "INVALID_SHA256_HASH")
+        key = query_hash(query)
+    if allowlist is not None:
+        if key not in allowlist:
+            raise PersistedQueryError("Operation is not in the allowlist", "PERSISTED_QUERY_NOT_ALLOWED")
+        query = allowlist[key]
+    return key, query
+
+
+documents = DocumentCache(getattr(settings, "GRAPHQL_DOCUMENT_CACHE_SIZE", 500))
+allowlist = load_allowlist(getattr(settings, "GRAPHQL_PERSISTED_QUERIES_ALLOWLIST", None))
@@ -0,0 +1,95 @@
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+def selected_fields(info, selection_sets):
+    """Map the field names selected in ``selection_sets`` to their field nodes.
+
+    Fragment spreads and inline fragments are flattened and selections of the
+    same field are merged, mirroring how the executor collects fields.
+    """
+    fields = {}
+    pending = [selection_set for selection_set in selection_sets if selection_set]
+    while pending:
+        for selection in pending.pop().selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, InlineFragmentNode):
+                pending.append(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                pending.append(info.fragments[selection.name.value].selection_set)
+    return fields
+
+
+def selection_at(info, path):
+    """Return the selection sets found under ``path`` below the current field."""
+    nodes = list(info.field_nodes)
+    for name in path:
+        nodes = selected_fields(info, [node.selection_set for node in nodes]).get(name, [])
+    return [node.selection_set for node in nodes]
+
+
+def plan(queryset, info, path=(), extra=()):
+    """Shape ``queryset`` after the GraphQL selection of the current field.
+
+    Only the selected columns are loaded with ``.only()``; selected forward
+    relations are joined with ``select_related`` and reverse or many-to-many
+    relations are fetched with ``prefetch_related``.  ``path`` points at the
+    object type inside a wrapper such as a connection (``("edges", "node")``)
+    and ``extra`` lists columns the resolver needs regardless of selection.
+    """
+    only, select, prefetch = walk(info, queryset.model, selection_at(info, path))
+    only.update(extra)
+    return shape(queryset, only, select, prefetch)
+
+
+def shape(queryset, only, select, prefetch):
+    queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def model_fields(model):
+    """Map attribute names of ``model`` (reverse accessors included) to fields."""
+    fields = {}
+    for field in model._meta.get_fields():
+        if field.auto_created and not field.concrete:
+            fields[field.get_accessor_name()] = field
+        else:
+            fields[field.name] = field
+    return fields
+
+
+def walk(info, model, selection_sets, prefix=""):
+    fields = model_fields(model)
+    only, select, prefetch = {prefix + model._meta.pk.name}, [], []
+    # Foreign key columns are always kept so loaders can batch on them.
+    for field in model._meta.concrete_fields:
+        if field.is_relation:
+            only.add(prefix + field.name)
+
+    for name, nodes in selected_fields(info, selection_sets).items():
+        attr = to_snake_case(name)
+        field = fields.get(attr)
+        if field is None:
+            continue
+        children = [node.selection_set for node in nodes]
+        if not field.is_relation:
+            only.add(prefix + field.name)
+        elif field.concrete and (field.many_to_one or field.one_to_one):
+            nested_only, nested_select, nested_prefetch = walk(
+                info, field.related_model, children, f"{prefix}{field.name}__"
+            )
+            only.update(nested_only)
+            select.append(prefix + field.name)
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        else:
+            related_model = field.related_model
+            related = shape(related_model._default_manager.all(), *walk(info, related_model, children))
+            prefetch.append(Prefetch(prefix + attr, queryset=related))
+    return only, select, prefetch
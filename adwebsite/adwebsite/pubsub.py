@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Put on a subscriber queue in place of its backlog when it cannot keep up.
+OVERFLOW = object()
+
+
+class SubscriptionOverflow(Exception):
+    pass
+
+
+def queue_size():
+    return getattr(settings, "GRAPHQL_SUBSCRIPTION_QUEUE_SIZE", 100)
+
+
+class Subscriber:
+    """Bounded queue of events for one subscription, consumed on its event loop.
+
+    Events are handed over with ``call_soon_threadsafe`` so they can be
+    published from any thread.  A subscriber whose queue is full is not
+    waited for: its backlog is dropped and iteration ends with
+    ``SubscriptionOverflow``, so the client resubscribes and refetches
+    instead of slowing down the publisher.
+    """
+
+    def __init__(self, backend, channels, maxsize):
+        self.backend = backend
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:
+            # The loop is closed; the connection is gone.
+            self.close()
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+            self.close()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is OVERFLOW:
+            raise SubscriptionOverflow("Too many undelivered events, subscribe again")
+        return event
+
+
+class LocalBackend:
+    """Delivers events to subscribers in this process only.
+
+    Enough for a single ASGI worker and for tests.  Deployments with several
+    workers need a backend on a shared broker with the same ``publish`` and
+    ``subscribe`` methods, selected with ``GRAPHQL_PUBSUB_BACKEND``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def subscribe(self, *channels):
+        subscriber = Subscriber(self, channels, queue_size())
+        with self.lock:
+            for channel in channels:
+                self.subscribers[channel].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            for channel in subscriber.channels:
+                self.subscribers[channel].discard(subscriber)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, "GRAPHQL_PUBSUB_BACKEND", "adwebsite.pubsub.LocalBackend"))()
+    return _backend
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def chat_event(action, chat):
+    return {
+        "action": action,
+        "id": chat.id,
+        "message": chat.message,
+        "sent_by": chat.sent_by_id,
+        "sent_to": chat.sent_to_id,
+        "product_id": chat.product_id_id,
+        "message_timing": chat.message_timing.isoformat(),
+    }
+
+
+def publish_chat(event):
+    """Send a ``chat_event`` to both participants once the current transaction commits."""
+    def publish():
+        backend = get_backend()
+        for user_id in {event["sent_by"], event["sent_to"]}:
+            backend.publish(user_channel(user_id), event)
+
+    transaction.on_commit(publish)
@@ -3,14 +3,18 @@ def get_products():
     query = '''{
   listProducts
   {
-    id
-    productName
-    productDescription
-    productPrice
-    postedBy {
-      id
+    edges {
+      node {
+        id
+        productName
+        productDescription
+        productPrice
+        postedBy {
+          id
+        }
+        postedOn
+      }
     }
-    postedOn
   }
 }'''
-    return query
\ No newline at end of file
+    return query
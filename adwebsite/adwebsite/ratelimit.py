@@ -0,0 +1,231 @@
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Buckets kept by LocalStore; the least recently used are dropped beyond it,
+# which only hands their clients a full bucket again.
+MAX_BUCKETS = 100_000
+
+
+def enabled():
+    return getattr(settings, "RATELIMIT_ENABLED", True)
+
+
+def max_concurrency():
+    return getattr(settings, "RATELIMIT_GRAPHQL_CONCURRENCY", 0)
+
+
+def parse_rate(rate):
+    """Return ``(tokens per second, burst)`` of a ``"count/period"`` rate, or ``None`` if it is empty."""
+    if not rate:
+        return None
+    try:
+        count, period = rate.split("/")
+        return int(count) / PERIODS[period], int(count)
+    except (KeyError, ValueError):
+        raise ImproperlyConfigured(f"Invalid rate {rate!r}, expected e.g. '100/m' with period s, m, h or d")
+
+
+class LocalStore:
+    """Token buckets in this process's memory.
+
+    Each worker process limits on its own, so a client gets the configured
+    rate from every worker.  Deployments that need one limit across workers
+    provide a store on shared storage with the same ``take`` method, selected
+    with ``RATELIMIT_STORE``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def take(self, key, cost, rate, burst):
+        """Take ``cost`` tokens from bucket ``key``; return 0 or the seconds until they would be there."""
+        # An operation costing more than the whole budget empties a full bucket.
+        cost = min(cost, burst)
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            if not wait:
+                tokens -= cost
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > MAX_BUCKETS:
+                self.buckets.popitem(last=False)
+        return wait
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = import_string(getattr(settings, "RATELIMIT_STORE", "adwebsite.ratelimit.LocalStore"))()
+    return _store
+
+
+class Stats:
+    """Requests let through and rejected, per limit."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.allowed = defaultdict(int)
+        self.rejected = defaultdict(int)
+
+    def count(self, limit, allowed):
+        with self.lock:
+            (self.allowed if allowed else self.rejected)[limit] += 1
+
+    def metrics(self):
+        """Extra metrics for ``Registry.render``."""
+        with self.lock:
+            return [
+                ("ratelimit_allowed_total", "counter", "Requests let through by the rate limiter, per limit.",
+                 {(("limit", limit),): count for limit, count in sorted(self.allowed.items())}),
+                ("ratelimit_rejected_total", "counter", "Requests rejected by the rate limiter, per limit.",
+                 {(("limit", limit),): count for limit, count in sorted(self.rejected.items())}),
+            ]
+
+
+stats = Stats()
+
+
+class RateLimited(Exception):
+    def __init__(self, limit, retry_after):
+        self.limit = limit
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Rate limit {limit} exceeded, retry in {self.retry_after} seconds")
+
+    def error(self):
+        """The GraphQL error reporting this."""
+        return {"message": str(self), "extensions": {"code": "RATE_LIMITED", "retryAfter": self.retry_after}}
+
+    def response(self):
+        response = HttpResponse(
+            json.dumps({"errors": [self.error()]}),
+            status=429,
+            content_type="application/json",
+        )
+        response["Retry-After"] = str(self.retry_after)
+        return response
+
+
+def client_key(request, user):
+    """The session user, else the client address.
+
+    Token-authenticated requests are keyed by the user the token authenticates;
+    an unverified token is never a key, or sending new ones would skip the limit.
+    """
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def check(limit, key, rate, cost=1):
+    """Charge ``cost`` to ``key`` under the setting-style ``rate``; raise ``RateLimited`` when it is spent."""
+    parsed = parse_rate(rate)
+    if parsed is None or not enabled():
+        return
+    wait = get_store().take(f"{limit}:{key}", cost, *parsed)
+    stats.count(limit, not wait)
+    if wait:
+        raise RateLimited(limit, wait)
+
+
+def username_key(username):
+    return "username:" + hashlib.sha256((username or "").lower().encode()).hexdigest()[:32]
+
+
+class Inflight:
+    """Requests each client has in progress in this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+
+    @contextmanager
+    def hold(self, key, limit):
+        with self.lock:
+            if limit and self.counts[key] >= limit:
+                stats.count("concurrency", False)
+                raise RateLimited("concurrency", 1)
+            self.counts[key] += 1
+        stats.count("concurrency", True)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.counts[key] -= 1
+                if not self.counts[key]:
+                    del self.counts[key]
+
+
+inflight = Inflight()
+
+
+def check_request(key):
+    """Charge ``key`` one GraphQL request."""
+    check("graphql", key, getattr(settings, "RATELIMIT_GRAPHQL", None))
+
+
+def graphql_limits(view):
+    """Apply the per-client request rate and concurrency limits to the GraphQL ``view``.
+
+    They run before the body is parsed, so a client over its limit costs next
+    to nothing. Mutation costs and per-field rates are charged by the view
+    once it knows the operation (see ``check_operation``).  The subscription
+    socket charges the same limits per operation (see ``adwebsite.subscriptions``).
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def limited(request, *args, **kwargs):
+            if not enabled():
+                return await view(request, *args, **kwargs)
+            key = client_key(request, await request.auser())
+            try:
+                check_request(key)
+                with inflight.hold(key, max_concurrency()):
+                    return await view(request, *args, **kwargs)
+            except RateLimited as e:
+                return e.response()
+        return markcoroutinefunction(limited)
+
+    @wraps(view)
+    def limited(request, *args, **kwargs):
+        if not enabled():
+            return view(request, *args, **kwargs)
+        key = client_key(request, request.user)
+        try:
+            check_request(key)
+            with inflight.hold(key, max_concurrency()):
+                return view(request, *args, **kwargs)
+        except RateLimited as e:
+            return e.response()
+    return limited
+
+
+def check_operation(request, fields, mutation_cost=None):
+    """Charge each root field in ``fields`` (name to times selected) its configured rate, and a mutation its static cost."""
+    if not enabled():
+        return
+    key = client_key(request, request.user)
+    rates = getattr(settings, "RATELIMIT_GRAPHQL_FIELDS", {})
+    for field, count in fields.items():
+        check(f"field:{field}", key, rates.get(field), count)
+    if mutation_cost is not None:
+        check("mutations", key, getattr(settings, "RATELIMIT_GRAPHQL_MUTATIONS", None), max(1, mutation_cost))
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import OperationType, print_ast
+from graphql.language import VariableNode
+from graphql.utilities import value_from_ast_untyped
+
+from adwebsite.cost import document_fragments
+from adwebsite.planner import selected_fields
+
+# Root fields that can be cached, with the tags their result depends on.
+ROOT_TAGS = {
+    "listUsers": lambda args: ["users"],
+    "listProducts": lambda args: ["products"],
+    "listMessages": lambda args: ["chats"],
+    "searchProducts": lambda args: ["products"],
+    "products": lambda args: ["products"],
+    "readProduct": lambda args: [f"seller:{args.get('userid')}"],
+    "readMessage": lambda args: [f"thread:{args.get('sentby')}:{args.get('sentto')}"],
+    "sellerStats": lambda args: [f"seller:{args.get('userid')}", "chats"],
+    "productStats": lambda args: ["products", "chats"],
+}
+
+# Relations whose rows are embedded in a result when they are selected.
+RELATION_TAGS = {
+    "postedBy": "users",
+    "sentBy": "users",
+    "sentTo": "users",
+    "seller": "users",
+    "product": "products",
+    "productId": "products",
+}
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+stats = Stats()
+
+
+def get_cache():
+    return caches[getattr(settings, "GRAPHQL_RESPONSE_CACHE_ALIAS", "default")]
+
+
+def timeout():
+    return getattr(settings, "GRAPHQL_RESPONSE_CACHE_TIMEOUT", 60)
+
+
+def tag_key(tag):
+    return f"gql-tag:{tag}"
+
+
+def tag_versions(tags):
+    """Current version of every tag; bumping a version orphans entries built on it."""
+    cache = get_cache()
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, 1, None)
+            versions[key] = cache.get(key, 1)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    cache = get_cache()
+    for tag in tags:
+        try:
+            cache.incr(tag_key(tag))
+        except ValueError:
+            cache.add(tag_key(tag), 1, None)
+        stats.count("invalidations")
+
+
+def tagged_key(prefix, tags, *parts):
+    """Build a cache key that changes whenever one of ``tags`` is invalidated."""
+    tags = sorted(set(tags))
+    versions = tag_versions(tags)
+    material = json.dumps([parts, tags, versions], sort_keys=True, default=str)
+    return f"{prefix}:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+
+def argument_values(node, variables):
+    values = {}
+    for argument in node.arguments:
+        if isinstance(argument.value, VariableNode):
+            values[argument.name.value] = (variables or {}).get(argument.value.name.value)
+        else:
+            values[argument.name.value] = value_from_ast_untyped(argument.value)
+    return values
+
+
+def operation_tags(info, operation, variables):
+    """Tags a query result depends on, or ``None`` if it must not be cached."""
+    tags = set()
+    root_fields = selected_fields(info, [operation.selection_set])
+    if not root_fields:
+        return None
+    for name, nodes in root_fields.items():
+        if name not in ROOT_TAGS:
+            return None
+        for node in nodes:
+            tags.update(ROOT_TAGS[name](argument_values(node, variables)))
+    fields = root_fields
+    while fields:
+        fields = selected_fields(info, [node.selection_set for nodes in fields.values() for node in nodes])
+        tags.update(RELATION_TAGS[name] for name in fields if name in RELATION_TAGS)
+    return tags
+
+
+def lookup_key(request, document, operation, variables):
+    """Return the cache key for ``operation`` or ``None`` if it is not cacheable."""
+    if timeout() <= 0 or operation is None or operation.operation != OperationType.QUERY:
+        return None
+    info = SimpleNamespace(fragments=document_fragments(document))
+    tags = operation_tags(info, operation, variables)
+    if tags is None:
+        return None
+    viewer = request.user.pk if request.user.is_authenticated else None
+    return tagged_key(
+        "gql-response",
+        tags,
+        print_ast(document),
+        operation.name.value if operation.name else None,
+        json.dumps(variables or {}, sort_keys=True, default=str),
+        viewer,
+    )
+
+
+def fetch(key):
+    data = get_cache().get(key)
+    stats.count("misses" if data is None else "hits")
+    return data
+
+
+def store(key, data):
+    get_cache().set(key, data, timeout())
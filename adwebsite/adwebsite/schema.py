@@ -1,75 +1,236 @@
 import graphene
+from datetime import datetime
+from asgiref.sync import sync_to_async
 from graphql import GraphQLError
+from django.db.models import Case, Exists, F, PositiveIntegerField, Q, When
 from graphene_django import DjangoObjectType
-from adwebsite.models import Product, User, Chat
-from django.contrib.auth.hashers import make_password
+from adwebsite.models import Product, User, Chat, Conversation, ProductStats, SellerStats
 from graphql_jwt.decorators import login_required
 from graphql_jwt.decorators import superuser_required
+from adwebsite.pagination import CountableConnection, paginate
+from adwebsite.loaders import Loaders, get_loaders, load_related
+from adwebsite.planner import plan
+from adwebsite.search import search_products
+from adwebsite.browse import browse_products, product_order
+from adwebsite.passwords import amake_password
+from adwebsite import bulk, conversations, pubsub, stats
 
 class Usertype(DjangoObjectType):
+    """A user's account, for the user mutations and the superuser-only listUsers."""
     class Meta:
         model = User
-        fields = ("id", "username", "email", "password")
+        fields = ("id", "username", "email")
+
+class PublicUser(DjangoObjectType):
+    """What other users may see of a user, returned by every relation to User."""
+    class Meta:
+        model = User
+        fields = ("id", "username")
 
 class Producttype(DjangoObjectType):
     class Meta:
         model = Product
         fields = ("id", "product_name", "product_description", "product_price", "posted_by", "posted_on")
 
+    posted_by = graphene.NonNull(PublicUser)
+
+    def resolve_posted_by(parent, info):
+        return load_related(parent, "posted_by", get_loaders(info).users)
+
 class Messagetype(DjangoObjectType):
     class Meta:
         model = Chat
         fields = ("id", "message", "sent_by", "sent_to", "product_id", "message_timing")
 
+    sent_by = graphene.NonNull(PublicUser)
+    sent_to = graphene.NonNull(PublicUser)
+
+    def resolve_sent_by(parent, info):
+        return load_related(parent, "sent_by", get_loaders(info).users)
+
+    def resolve_sent_to(parent, info):
+        return load_related(parent, "sent_to", get_loaders(info).users)
+
+    def resolve_product_id(parent, info):
+        return load_related(parent, "product_id", get_loaders(info).products)
+
+class Conversationtype(DjangoObjectType):
+    class Meta:
+        model = Conversation
+        fields = ("id", "product", "buyer", "seller", "last_message", "last_message_at", "buyer_unread", "seller_unread")
+
+    buyer = graphene.NonNull(PublicUser)
+    seller = graphene.NonNull(PublicUser)
+    unread = graphene.Int()
+
+    def resolve_product(parent, info):
+        return load_related(parent, "product", get_loaders(info).products)
+
+    def resolve_buyer(parent, info):
+        return load_related(parent, "buyer", get_loaders(info).users)
+
+    def resolve_seller(parent, info):
+        return load_related(parent, "seller", get_loaders(info).users)
+
+    def resolve_unread(parent, info):
+        return parent.buyer_unread if info.context.user.id == parent.buyer_id else parent.seller_unread
+
+class SellerStatstype(DjangoObjectType):
+    class Meta:
+        model = SellerStats
+        fields = ("seller", "product_count", "message_count")
+
+    seller = graphene.NonNull(PublicUser)
+
+    def resolve_seller(parent, info):
+        return load_related(parent, "seller", get_loaders(info).users)
+
+class ProductStatstype(DjangoObjectType):
+    class Meta:
+        model = ProductStats
+        fields = ("product", "message_count")
+
+    def resolve_product(parent, info):
+        return load_related(parent, "product", get_loaders(info).products)
+
+class ProductConnection(CountableConnection):
+    class Meta:
+        node = Producttype
+
+class MessageConnection(CountableConnection):
+    class Meta:
+        node = Messagetype
+
+class ConversationConnection(CountableConnection):
+    class Meta:
+        node = Conversationtype
+
+class ProductFilter(graphene.InputObjectType):
+    price_min = graphene.Int()
+    price_max = graphene.Int()
+    posted_by = graphene.Int()
+    posted_since = graphene.DateTime()
+
+class ProductOrder(graphene.Enum):
+    POSTED_ON_DESC = 1
+    POSTED_ON_ASC = 2
+    PRICE_ASC = 3
+    PRICE_DESC = 4
+
 class Query(graphene.ObjectType):
     list_users = graphene.List(Usertype)
-    list_products = graphene.List(Producttype)
-    list_messages = graphene.List(Messagetype)
+    list_products = graphene.Field(ProductConnection, first=graphene.Int(), after=graphene.String())
+    list_messages = graphene.Field(MessageConnection, first=graphene.Int(), after=graphene.String())
+    inbox = graphene.Field(ConversationConnection, first=graphene.Int(), after=graphene.String())
+    search_products = graphene.Field(
+        ProductConnection,
+        query=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+        price_min=graphene.Int(),
+        price_max=graphene.Int(),
+        posted_by=graphene.Int(),
+    )
+    products = graphene.Field(
+        ProductConnection,
+        filter=ProductFilter(),
+        order_by=graphene.List(graphene.NonNull(ProductOrder)),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
     read_product = graphene.List(Producttype, userid=graphene.Int())
     read_message = graphene.List(Messagetype, sentby=graphene.Int(), sentto=graphene.Int())
+    seller_stats = graphene.Field(SellerStatstype, userid=graphene.Int(required=True))
+    product_stats = graphene.Field(ProductStatstype, product_id=graphene.Int(required=True))
 
     @superuser_required
-    def resolve_list_users(root, info):
-        users = User.objects.all()
-        if users:
-            return users
-        else:
+    async def resolve_list_users(root, info):
+        users = [user async for user in plan(User.objects.all(), info)]
+        if not users:
             raise Exception(f"No Users registered")
+        return users
         
     @login_required
-    def resolve_list_products(root, info):
-        products = Product.objects.all()
-        if products:
-            return products
-        else:
-            raise Exception(f"No products posted for any users")
+    async def resolve_list_products(root, info, first=None, after=None):
+        products = plan(Product.objects.all(), info, ("edges", "node"), ["posted_on"])
+        return await paginate(ProductConnection, products, "posted_on", first, after)
     
     @login_required
-    def resolve_list_messages(root, info):
-        chats = Chat.objects.all()
-        if chats:
-            return chats
-        else:
-            raise Exception(f"No messages registered")
+    async def resolve_list_messages(root, info, first=None, after=None):
+        chats = plan(Chat.objects.all(), info, ("edges", "node"), ["message_timing"])
+        return await paginate(MessageConnection, chats, "message_timing", first, after)
     
     @login_required
-    def resolve_read_product(root, info, userid):
-        products = Product.objects.filter(posted_by=userid)
-        if products:
-            return products
-        else:
-            user = User.objects.get(id=userid)
+    async def resolve_inbox(root, info, first=None, after=None):
+        viewer = info.context.user.id
+        threads = Conversation.objects.filter(Q(buyer=viewer) | Q(seller=viewer))
+        threads = plan(threads, info, ("edges", "node"), ["last_message_at", "buyer_unread", "seller_unread"])
+        return await paginate(ConversationConnection, threads, "last_message_at", first, after)
+
+    @login_required
+    async def resolve_search_products(root, info, query, first=None, after=None, price_min=None, price_max=None, posted_by=None):
+        products = search_products(Product.objects.all(), query, price_min, price_max, posted_by)
+        products = plan(products, info, ("edges", "node"))
+        return await paginate(ProductConnection, products, "rank", first, after, parse_value=float)
+
+    @login_required
+    async def resolve_products(root, info, filter=None, order_by=None, first=None, after=None):
+        order_fields, parse_values, descending = product_order([key.name for key in order_by or ()])
+        products = browse_products(Product.objects.all(), **(filter or {}))
+        products = plan(products, info, ("edges", "node"), order_fields)
+        return await paginate(ProductConnection, products, order_fields, first, after, parse_values, descending)
+
+    @login_required
+    async def resolve_read_product(root, info, userid):
+        products = plan(Product.objects.filter(posted_by=userid).order_by("-posted_on"), info)
+        products = [product async for product in products]
+        if not products:
+            user = await get_loaders(info).users.load(userid)
+            if not user:
+                raise Exception(f"User with id {userid} does not exist")
             raise Exception(f"No products posted by the user: {user.username}")
+        return products
     
     @login_required
-    def resolve_read_message(root, info, sentby, sentto):
-        chats = Chat.objects.filter(sent_by=sentby, sent_to=sentto)
-        if chats:
-            return chats
-        else:
-            from_user = User.objects.get(id=sentby)
-            to_user = User.objects.get(id=sentto)
+    async def resolve_read_message(root, info, sentby, sentto):
+        chats = plan(Chat.objects.filter(sent_by=sentby, sent_to=sentto).order_by("message_timing"), info)
+        chats = [chat async for chat in chats]
+        if not chats:
+            from_user, to_user = await get_loaders(info).users.load_many([sentby, sentto])
+            if not from_user:
+                raise Exception(f"User with id {sentby} does not exist")
+            if not to_user:
+                raise Exception(f"User with id {sentto} does not exist")
             raise Exception(f"No messages sent by the user: {from_user.username} to the user: {to_user.username}")
+        return chats
+
+    @login_required
+    async def resolve_seller_stats(root, info, userid):
+        seller_stats = await SellerStats.objects.filter(seller=userid).afirst()
+        if seller_stats:
+            return seller_stats
+        # Users without ads have no row yet.
+        if not await get_loaders(info).users.load(userid):
+            raise Exception(f"User with id {userid} does not exist")
+        return SellerStats(seller_id=userid)
+
+    @login_required
+    async def resolve_product_stats(root, info, product_id):
+        product_stats = await ProductStats.objects.filter(product=product_id).afirst()
+        if product_stats:
+            return product_stats
+        # Products nobody has messaged about have no row yet.
+        if not await get_loaders(info).products.load(product_id):
+            raise Exception(f"Product with id {product_id} does not exist")
+        return ProductStats(product_id=product_id)
+
+def check_unique(users, username, email):
+    for user in users:
+        if user.username == username:
+            raise Exception(f"Username already exists: {username}")
+    for user in users:
+        if user.email == email:
+            raise Exception(f"Email already exists: {email}")
 
 class UserMutation(graphene.Mutation):
     class Arguments:
@@ -80,17 +241,12 @@ class UserMutation(graphene.Mutation):
     user = graphene.Field(Usertype)
 
     @classmethod
-    def mutate(cls, root, info, username, email, password):
-        
-        if User.objects.filter(username=username).values() or User.objects.filter(email=email).values():
-            if User.objects.filter(username=username).exists():
-                raise Exception(f"Username already exists: {username}")
-            if User.objects.filter(email=email).exists():
-                raise Exception(f"Email already exists: {email}")
-        
-        
-        user = User(username=username, email=email, password=make_password(password))
-        user.save()
+    async def mutate(cls, root, info, username, email, password):
+        taken = User.objects.filter(Q(username=username) | Q(email=email)).only("username", "email")
+        check_unique([user async for user in taken], username, email)
+
+        user = User(username=username, email=email, password=await amake_password(password))
+        await user.asave()
         return UserMutation(user=user)
      
 class UserUpdate(graphene.Mutation):
@@ -103,22 +259,19 @@ class UserUpdate(graphene.Mutation):
     user = graphene.Field(Usertype)
 
     @classmethod
-    def mutate(cls, root, info, username, email, password, id):
-
-        if User.objects.filter(username=username).values() or User.objects.filter(email=email).values():
-            if User.objects.filter(username=username).exists():
-                raise Exception(f"Username already exists: {username}")
-            if User.objects.filter(email=email).exists():
-                raise Exception(f"Email already exists: {email}")
-            
-        if not User.objects.filter(id=id).values():
+    async def mutate(cls, root, info, username, email, password, id):
+        # The user and anyone already holding the username or email in one query.
+        matches = [match async for match in User.objects.filter(Q(id=id) | Q(username=username) | Q(email=email))]
+        user = next((match for match in matches if str(match.id) == str(id)), None)
+        check_unique([match for match in matches if match is not user], username, email)
+
+        if not user:
             raise Exception(f"User with id does not exists: {id}")
-            
-        user = User.objects.get(id=id)
+
         user.username = username
         user.email = email
-        user.password = make_password(password)
-        user.save()
+        user.password = await amake_password(password)
+        await user.asave(update_fields=["username", "email", "password"])
         return UserMutation(user=user)
 
 class UserDelete(graphene.Mutation):
@@ -128,12 +281,12 @@ class UserDelete(graphene.Mutation):
     user = graphene.Field(Usertype)
 
     @classmethod   
-    def mutate(cls, root, info, id):
-        if not User.objects.filter(id=id).values():
+    async def mutate(cls, root, info, id):
+        user = await User.objects.filter(id=id).afirst()
+        if not user:
             raise Exception(f"User with id does not exists: {id}")
 
-        user = User.objects.get(id=id) 
-        user.delete()
+        await sync_to_async(stats.delete_user)(user)
         return UserMutation(user=user)
  
 class ProductMutation(graphene.Mutation):
@@ -146,12 +299,12 @@ class ProductMutation(graphene.Mutation):
     product = graphene.Field(Producttype)
 
     @classmethod
-    def mutate(cls, root, info, product_name, product_description, product_price, posted_by):
-        user = User.objects.get(id=posted_by)
+    async def mutate(cls, root, info, product_name, product_description, product_price, posted_by):
+        user = await get_loaders(info).users.load(posted_by)
         
         if user:
             product = Product(product_name = product_name, product_description = product_description, product_price = product_price, posted_by = user)
-            product.save()
+            await sync_to_async(stats.save_product)(product)
             return ProductMutation(product=product)
         else:
             raise Exception(f"User with id {posted_by} does not exists")
@@ -167,26 +320,31 @@ class ProductUpdate(graphene.Mutation):
     product = graphene.Field(Producttype)
 
     @classmethod
-    def mutate(cls, root, info, product_id, product_name=None, product_description=None, product_price=None, posted_by=None):
+    async def mutate(cls, root, info, product_id, product_name=None, product_description=None, product_price=None, posted_by=None):
         
-        product = Product.objects.filter(id=product_id).first()
+        loaders = get_loaders(info)
+        product = await loaders.products.load(product_id)
         if not product:
             raise Exception(f"Product with id {product_id} does not exist.")
 
-        user = User.objects.filter(id=posted_by).first()
-        if not user:
-            raise Exception(f"User with id {posted_by} does not exist.")
-        
-        if product.posted_by.id != posted_by:
+        # The owner necessarily exists, so the user is only looked up to report errors.
+        if product.posted_by_id != posted_by:
+            if not await loaders.users.load(posted_by):
+                raise Exception(f"User with id {posted_by} does not exist.")
             raise Exception(f"User with id {posted_by} is not the owner of this ad")
 
+        changed = []
         if product_name:
             product.product_name = product_name
+            changed.append("product_name")
         if product_description:
             product.product_description = product_description
+            changed.append("product_description")
         if product_price:
             product.product_price = product_price
-        product.save()
+            changed.append("product_price")
+        if changed:
+            await product.asave(update_fields=changed)
 
         return ProductUpdate(product=product)
 
@@ -197,18 +355,18 @@ class ProductDelete(graphene.Mutation):
     product = graphene.Field(Producttype)
 
     @classmethod   
-    def mutate(cls, root, info, id, user_id):
-        product = Product.objects.filter(id=id).first()
-        user = User.objects.filter(id=user_id).first()
+    async def mutate(cls, root, info, id, user_id):
+        loaders = get_loaders(info)
+        product = await loaders.products.load(id)
 
         if not product:
             raise Exception(f"product with this id does not exists: {id}")
         
-        if product.posted_by.id != user.id:
+        if str(product.posted_by_id) != str(user_id):
             raise Exception(f"User with id {user_id} is not the owner of this ad")
 
-        product = Product.objects.get(id=id) 
-        product.delete()
+        await sync_to_async(stats.delete_product)(product)
+        loaders.products.clear(id)
         return True
 
 class MessageMutation(graphene.Mutation):
@@ -222,10 +380,10 @@ class MessageMutation(graphene.Mutation):
     message = graphene.Field(Messagetype)
 
     @classmethod
-    def mutate(cls, root, info, message, sent_by, sent_to, product_id):
-        sending_user = User.objects.filter(id=sent_by).first()
-        receiving_user = User.objects.filter(id=sent_to).first()
-        product = Product.objects.filter(id=product_id).first()
+    async def mutate(cls, root, info, message, sent_by, sent_to, product_id):
+        loaders = get_loaders(info)
+        sending_user, receiving_user = await loaders.users.load_many([sent_by, sent_to])
+        product = await loaders.products.load(product_id)
 
         if not sending_user:
             raise Exception(f"User with id {sent_by} does not exist")
@@ -238,11 +396,12 @@ class MessageMutation(graphene.Mutation):
         if not product:
             raise Exception(f"Product with id {product_id} does not exist")
         
-        if product.posted_by.id != receiving_user.id:
+        if product.posted_by_id != receiving_user.id:
             raise Exception(f"Product with id {product_id} is not posted by the receiving user")
 
-        message = Chat(message=message, sent_by=sending_user.id, sent_to=receiving_user, product_id=product)
-        message.save()
+        message = Chat(message=message, sent_by=sending_user, sent_to=receiving_user, product_id=product)
+        await sync_to_async(conversations.save_message)(message)
+        await sync_to_async(pubsub.publish_chat)(pubsub.chat_event("created", message))
         return MessageMutation(message=message)
 
 class MessageUpdate(graphene.Mutation):
@@ -255,26 +414,25 @@ class MessageUpdate(graphene.Mutation):
     chat = graphene.Field(Messagetype)
 
     @classmethod
-    def mutate(cls, root, info, id, message, user_id, product_id):
-        chat = Chat.objects.filter(id=id).first()
-        sending_user = User.objects.filter(id=user_id).first()
-        product = Product.objects.filter(id=product_id).first()
+    async def mutate(cls, root, info, id, message, user_id, product_id):
+        product_exists = Exists(Product.objects.filter(id=product_id))
+        chat = await Chat.objects.filter(id=id).annotate(product_exists=product_exists).afirst()
 
         if not chat:
             raise Exception(f"Message with id {id} does not exist")
-        
-        if not sending_user:
-            raise Exception(f"User with id {sending_user} does not exist")
-        
-        if not product:
-            raise Exception(f"Product with id {product_id} does not exist")
 
-        if sending_user.id != chat.sent_by:
+        if chat.sent_by_id != user_id:
+            if not await get_loaders(info).users.load(user_id):
+                raise Exception(f"User with id {user_id} does not exist")
             raise Exception(f"You cannot update this message")
 
+        if not chat.product_exists:
+            raise Exception(f"Product with id {product_id} does not exist")
+
         if message:
             chat.message = message
-        chat.save()
+            await sync_to_async(conversations.update_message)(chat)
+            await sync_to_async(pubsub.publish_chat)(pubsub.chat_event("updated", chat))
 
         return MessageUpdate(chat=chat)
     
@@ -286,20 +444,153 @@ class MessageDelete(graphene.Mutation):
     chat = graphene.Field(Messagetype)
 
     @classmethod   
-    def mutate(cls, root, info, id, user_id):
-        chat = Chat.objects.filter(id=id).first()
-        user = User.objects.filter(id=user_id).first()
+    async def mutate(cls, root, info, id, user_id):
+        chat = await Chat.objects.filter(id=id).afirst()
 
         if not chat:
             raise Exception(f"Message with this id does not exists: {id}")
         
-        if chat.sent_by != user.id:
+        if str(chat.sent_by_id) != str(user_id):
             raise Exception(f"User with id {user_id} is not the owner of this message")
 
-        message = Chat.objects.get(id=id) 
-        message.delete()
+        event = pubsub.chat_event("deleted", chat)
+        await sync_to_async(conversations.delete_message)(chat)
+        await sync_to_async(pubsub.publish_chat)(event)
         return True
         
+class ConversationRead(graphene.Mutation):
+    class Arguments:
+        id = graphene.ID()
+
+    conversation = graphene.Field(Conversationtype)
+
+    @classmethod
+    @login_required
+    async def mutate(cls, root, info, id):
+        viewer = info.context.user.id
+        # Clears the viewer's own counter, whichever side of the conversation they are on.
+        updated = await Conversation.objects.filter(Q(buyer=viewer) | Q(seller=viewer), id=id).aupdate(
+            buyer_unread=Case(When(buyer=viewer, then=0), default=F("buyer_unread"), output_field=PositiveIntegerField()),
+            seller_unread=Case(When(seller=viewer, then=0), default=F("seller_unread"), output_field=PositiveIntegerField()),
+        )
+        if not updated:
+            raise Exception(f"Conversation with id {id} does not exist")
+        return ConversationRead(conversation=await Conversation.objects.aget(id=id))
+
+class BulkError(graphene.ObjectType):
+    index = graphene.Int()
+    message = graphene.String()
+
+def bulk_errors(errors):
+    return [BulkError(index=index, message=message) for index, message in errors]
+
+class ProductInput(graphene.InputObjectType):
+    product_name = graphene.String(required=True)
+    product_description = graphene.String(required=True)
+    product_price = graphene.Int(required=True)
+    posted_by = graphene.Int(required=True)
+
+class ProductUpdateInput(graphene.InputObjectType):
+    product_id = graphene.Int(required=True)
+    product_name = graphene.String()
+    product_description = graphene.String()
+    product_price = graphene.Int()
+    posted_by = graphene.Int(required=True)
+
+class ProductDeleteInput(graphene.InputObjectType):
+    id = graphene.Int(required=True)
+    user_id = graphene.Int(required=True)
+
+class MessageInput(graphene.InputObjectType):
+    message = graphene.String(required=True)
+    sent_by = graphene.Int(required=True)
+    sent_to = graphene.Int(required=True)
+    product_id = graphene.Int(required=True)
+
+class MessageUpdateInput(graphene.InputObjectType):
+    id = graphene.Int(required=True)
+    message = graphene.String()
+    user_id = graphene.Int(required=True)
+
+class MessageDeleteInput(graphene.InputObjectType):
+    id = graphene.Int(required=True)
+    user_id = graphene.Int(required=True)
+
+class ProductBulkCreate(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(ProductInput), required=True)
+
+    products = graphene.List(Producttype)
+    errors = graphene.List(BulkError)
+
+    @classmethod
+    async def mutate(cls, root, info, input):
+        products, errors = await sync_to_async(bulk.create_products)(input)
+        return ProductBulkCreate(products=products, errors=bulk_errors(errors))
+
+class ProductBulkUpdate(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(ProductUpdateInput), required=True)
+
+    products = graphene.List(Producttype)
+    errors = graphene.List(BulkError)
+
+    @classmethod
+    async def mutate(cls, root, info, input):
+        products, errors = await sync_to_async(bulk.update_products)(input)
+        return ProductBulkUpdate(products=products, errors=bulk_errors(errors))
+
+class ProductBulkDelete(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(ProductDeleteInput), required=True)
+
+    deleted = graphene.List(graphene.ID)
+    errors = graphene.List(BulkError)
+
+    @classmethod
+    async def mutate(cls, root, info, input):
+        deleted, errors = await sync_to_async(bulk.delete_products)(input)
+        for id in deleted:
+            if id is not None:
+                get_loaders(info).products.clear(id)
+        return ProductBulkDelete(deleted=deleted, errors=bulk_errors(errors))
+
+class MessageBulkCreate(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(MessageInput), required=True)
+
+    messages = graphene.List(Messagetype)
+    errors = graphene.List(BulkError)
+
+    @classmethod
+    async def mutate(cls, root, info, input):
+        messages, errors = await sync_to_async(bulk.create_messages)(input)
+        return MessageBulkCreate(messages=messages, errors=bulk_errors(errors))
+
+class MessageBulkUpdate(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(MessageUpdateInput), required=True)
+
+    messages = graphene.List(Messagetype)
+    errors = graphene.List(BulkError)
+
+    @classmethod
+    async def mutate(cls, root, info, input):
+        messages, errors = await sync_to_async(bulk.update_messages)(input)
+        return MessageBulkUpdate(messages=messages, errors=bulk_errors(errors))
+
+class MessageBulkDelete(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(MessageDeleteInput), required=True)
+
+    deleted = graphene.List(graphene.ID)
+    errors = graphene.List(BulkError)
+
+    @classmethod
+    async def mutate(cls, root, info, input):
+        deleted, errors = await sync_to_async(bulk.delete_messages)(input)
+        return MessageBulkDelete(deleted=deleted, errors=bulk_errors(errors))
+
 class Mutation(graphene.ObjectType):
     create_user = UserMutation.Field()  
     update_user = UserUpdate.Field()   
@@ -313,4 +604,53 @@ class Mutation(graphene.ObjectType):
     update_message = MessageUpdate.Field()
     delete_message = MessageDelete.Field()
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+    read_conversation = ConversationRead.Field()
+
+    create_products = ProductBulkCreate.Field()
+    update_products = ProductBulkUpdate.Field()
+    delete_products = ProductBulkDelete.Field()
+
+    create_messages = MessageBulkCreate.Field()
+    update_messages = MessageBulkUpdate.Field()
+    delete_messages = MessageBulkDelete.Field()
+
+class MessageAction(graphene.Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+class MessageEvent(graphene.ObjectType):
+    action = graphene.Field(MessageAction)
+    message = graphene.Field(Messagetype)
+
+def chat_from_event(event):
+    return Chat(
+        id=event["id"],
+        message=event["message"],
+        sent_by_id=event["sent_by"],
+        sent_to_id=event["sent_to"],
+        product_id_id=event["product_id"],
+        message_timing=datetime.fromisoformat(event["message_timing"]),
+    )
+
+class Subscription(graphene.ObjectType):
+    message_received = graphene.Field(MessageEvent, product_id=graphene.Int(), counterpart=graphene.Int())
+
+    @login_required
+    async def subscribe_message_received(root, info, product_id=None, counterpart=None):
+        viewer = info.context.user.id
+        subscriber = pubsub.get_backend().subscribe(pubsub.user_channel(viewer))
+        try:
+            async for event in subscriber:
+                other = event["sent_to"] if event["sent_by"] == viewer else event["sent_by"]
+                if product_id is not None and event["product_id"] != product_id:
+                    continue
+                if counterpart is not None and other != counterpart:
+                    continue
+                # Users and products may have changed since the previous event.
+                info.context.loaders = Loaders()
+                yield MessageEvent(action=event["action"], message=chat_from_event(event))
+        finally:
+            subscriber.close()
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
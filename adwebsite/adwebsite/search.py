@@ -0,0 +1,22 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from adwebsite.browse import browse_products
+from adwebsite.models import SEARCH_CONFIG
+
+
+def search_products(queryset, text, price_min=None, price_max=None, posted_by=None):
+    """Filter ``queryset`` to products matching ``text`` and annotate their ``rank``.
+
+    ``text`` uses web search syntax ("quoted phrases", or, -excluded).  The
+    match runs against the GIN-indexed ``search_vector``; product names weigh
+    more than descriptions in the rank.  The other filters are the products
+    browser's (see ``browse_products``).
+    """
+    if not text or not text.strip():
+        raise Exception("Search query must not be empty")
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    queryset = browse_products(queryset.filter(search_vector=query), price_min, price_max, posted_by)
+    # ts_rank returns a real; compare cursors in double precision so they round-trip exactly.
+    return queryset.annotate(rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
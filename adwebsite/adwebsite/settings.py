@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'adwebsite',
     'graphene_django'
 ]
@@ -77,18 +78,63 @@ WSGI_APPLICATION = 'adwebsite.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Production servers keep connections in a psycopg pool, one per worker process.
+# Set DB_POOL_MAX_SIZE to about the number of requests a worker serves with the
+# database at once; ASGI requests run their queries on separate threads, so
+# concurrent requests each hold a connection. Further ones wait DB_POOL_TIMEOUT.
+# Keep WEB_CONCURRENCY * DB_POOL_MAX_SIZE plus headroom for migrations and admin
+# sessions at or below the server's max_connections.
+
+# Share connections through a psycopg_pool.ConnectionPool in each worker.
+DB_POOL = env.bool("DB_POOL", default=False)
+
+# Connections each worker's pool keeps open, and the most it opens under load.
+DB_POOL_MIN_SIZE = env.int("DB_POOL_MIN_SIZE", default=2)
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", default=10)
+
+# Seconds a request waits for a pooled connection before failing.
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", default=10)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'django.db.backends.postgresql',
         'NAME': env("DB_NAME"),
         'USER': env("DB_USER"),
         'PASSWORD': env("DB_PASSWORD"),
         'HOST': env("DB_HOST"),
         'PORT': env("DB_PORT"),
+        # Without a pool, keep each thread's connection for this many seconds. Pools require 0.
+        'CONN_MAX_AGE': 0 if DB_POOL else env.int("DB_CONN_MAX_AGE", default=60),
+        # Check reused connections (pooled or persistent) before handing them out.
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            },
+        } if DB_POOL else {},
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds a user's rendered product listing on /home/ is served from cache.
+HOME_CACHE_TIMEOUT = env.int("HOME_CACHE_TIMEOUT", default=60)
+
+# Cache alias and lifetime in seconds of cached GraphQL query responses; 0 disables it.
+GRAPHQL_RESPONSE_CACHE_ALIAS = env("GRAPHQL_RESPONSE_CACHE_ALIAS", default="default")
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = env.int("GRAPHQL_RESPONSE_CACHE_TIMEOUT", default=60)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -107,6 +153,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hasher for new passwords: "argon2", "bcrypt" or "pbkdf2". Stored hashes of the
+# others are rehashed with it when their user next logs in.
+PASSWORD_HASHER = env("PASSWORD_HASHER", default="argon2")
+
+_password_hashers = {
+    "argon2": "adwebsite.passwords.Argon2PasswordHasher",
+    "bcrypt": "adwebsite.passwords.BCryptSHA256PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _password_hashers[PASSWORD_HASHER],
+    *(path for name, path in _password_hashers.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# Argon2 costs: passes, memory in KiB and lanes. The defaults follow OWASP's 19 MiB, t=2, p=1.
+PASSWORD_ARGON2_TIME_COST = env.int("PASSWORD_ARGON2_TIME_COST", default=2)
+PASSWORD_ARGON2_MEMORY_COST = env.int("PASSWORD_ARGON2_MEMORY_COST", default=19456)
+PASSWORD_ARGON2_PARALLELISM = env.int("PASSWORD_ARGON2_PARALLELISM", default=1)
+
+# Log2 of the bcrypt work factor.
+PASSWORD_BCRYPT_ROUNDS = env.int("PASSWORD_BCRYPT_ROUNDS", default=12)
+
+# Threads hashing passwords for the user mutations, off the event loop. 0 uses one per core.
+PASSWORD_HASHING_THREADS = env.int("PASSWORD_HASHING_THREADS", default=0)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -131,5 +203,110 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 GRAPHENE = {
-    "SCHEMA": "adwebsite.schema.schema"
+    "SCHEMA": "adwebsite.schema.schema",
+    "MIDDLEWARE": ["adwebsite.tracing.TracingMiddleware"],
+}
+
+# Serve /graphql with the async view. Set by asgi.py; WSGI deployments use the sync view.
+GRAPHQL_ASYNC = env.bool("GRAPHQL_ASYNC", default=False)
+
+# Upper bound for the ``first`` argument of paginated GraphQL connections.
+GRAPHQL_MAX_PAGE_SIZE = env.int("GRAPHQL_MAX_PAGE_SIZE", default=100)
+
+# Budget for the static cost of one GraphQL operation (see adwebsite.cost).
+GRAPHQL_MAX_COST = env.int("GRAPHQL_MAX_COST", default=1000)
+
+# Maximum nesting depth of a GraphQL operation.
+GRAPHQL_MAX_DEPTH = env.int("GRAPHQL_MAX_DEPTH", default=10)
+
+# Maximum number of items accepted by one bulk mutation (createProducts, createMessages, ...).
+GRAPHQL_MAX_BULK_SIZE = env.int("GRAPHQL_MAX_BULK_SIZE", default=1000)
+
+# Number of parsed and validated GraphQL documents kept in memory, keyed by sha256.
+GRAPHQL_DOCUMENT_CACHE_SIZE = env.int("GRAPHQL_DOCUMENT_CACHE_SIZE", default=500)
+
+# Path to a JSON list of query documents. When set, only these operations are served.
+GRAPHQL_PERSISTED_QUERIES_ALLOWLIST = env("GRAPHQL_PERSISTED_QUERIES_ALLOWLIST", default=None)
+
+# Pub/sub backend feeding GraphQL subscriptions; LocalBackend only reaches subscribers in the same process.
+GRAPHQL_PUBSUB_BACKEND = env("GRAPHQL_PUBSUB_BACKEND", default="adwebsite.pubsub.LocalBackend")
+
+# Undelivered events kept per subscription (and messages per socket) before a slow client is dropped.
+GRAPHQL_SUBSCRIPTION_QUEUE_SIZE = env.int("GRAPHQL_SUBSCRIPTION_QUEUE_SIZE", default=100)
+
+# Add per-resolver timings and SQL totals to responses as ``extensions.tracing``.
+GRAPHQL_TRACING = env.bool("GRAPHQL_TRACING", default=False)
+
+# Operations slower than this are logged with their SQL by the adwebsite.graphql.slow logger. 0 disables it.
+GRAPHQL_SLOW_OPERATION_MS = env.int("GRAPHQL_SLOW_OPERATION_MS", default=500)
+
+# Distinct operation names tracked by /metrics; further names are reported as "other".
+GRAPHQL_METRICS_MAX_OPERATIONS = env.int("GRAPHQL_METRICS_MAX_OPERATIONS", default=200)
+
+# Bearer token Prometheus sends to scrape /metrics. Without it only staff users can read the endpoint.
+GRAPHQL_METRICS_TOKEN = env("GRAPHQL_METRICS_TOKEN", default=None)
+
+# Rows fetched per round trip, and encoded per response chunk, by the /export/ endpoint and command.
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Seconds exports stay behind the clock, so rows still committing are left for the next export.
+EXPORT_WATERMARK_LAG = env.int("EXPORT_WATERMARK_LAG", default=60)
+
+# Load session users through the cache; see adwebsite.auth. Migration 0009 moves sessions
+# started under ModelBackend over; listing both would check every failed login twice.
+AUTHENTICATION_BACKENDS = ["adwebsite.auth.CachedModelBackend"]
+
+# Seconds a session's user stays cached. Bounds how long other workers keep a changed user. 0 disables it.
+AUTH_USER_CACHE_TIMEOUT = env.int("AUTH_USER_CACHE_TIMEOUT", default=60)
+
+# Rate limits are token buckets per client (the session user, else the IP address), written
+# "count/period" with period s, m, h or d; the count is also the burst. An empty value disables one.
+RATELIMIT_ENABLED = env.bool("RATELIMIT_ENABLED", default=True)
+
+# Where the buckets live; LocalStore keeps them per worker process (see adwebsite.ratelimit).
+RATELIMIT_STORE = env("RATELIMIT_STORE", default="adwebsite.ratelimit.LocalStore")
+
+# Requests to /graphql, checked before the body is parsed.
+RATELIMIT_GRAPHQL = env("RATELIMIT_GRAPHQL", default="600/m")
+
+# Budget of mutations, each charged its static cost (see adwebsite.cost).
+RATELIMIT_GRAPHQL_MUTATIONS = env("RATELIMIT_GRAPHQL_MUTATIONS", default="600/m")
+
+# Extra limits per root field, e.g. RATELIMIT_GRAPHQL_FIELDS=createUser=10/h,searchProducts=120/m
+RATELIMIT_GRAPHQL_FIELDS = env.dict("RATELIMIT_GRAPHQL_FIELDS", default={
+    "createUser": "10/h",
+    "updateUser": "30/h",
+    "searchProducts": "120/m",
+})
+
+# /graphql requests one client may have in progress in a worker process. 0 disables it.
+RATELIMIT_GRAPHQL_CONCURRENCY = env.int("RATELIMIT_GRAPHQL_CONCURRENCY", default=8)
+
+# Login attempts per client address and username: one client guessing one account's password.
+RATELIMIT_LOGIN = env("RATELIMIT_LOGIN", default="10/m")
+
+# Login attempts per client address, over all usernames.
+RATELIMIT_LOGIN_CLIENT = env("RATELIMIT_LOGIN_CLIENT", default="30/m")
+
+# Login attempts per username from all addresses. Whoever spends it locks the account's owner out
+# until it refills, so keep it above RATELIMIT_LOGIN: a single address cannot spend it alone.
+RATELIMIT_LOGIN_USERNAME = env("RATELIMIT_LOGIN_USERNAME", default="30/m")
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per GraphQL operation; slow operations also log their SQL.
+        "adwebsite.graphql": {
+            "handlers": ["console"],
+            "level": env("GRAPHQL_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
 }
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from adwebsite import auth, response_cache, tracing
+from adwebsite.models import Chat, Product, User
+
+# Tags are bumped once the write commits; bumped earlier, a concurrent reader
+# could cache the old rows under the new version.
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    tags = ["products", f"seller:{instance.posted_by_id}"]
+    transaction.on_commit(lambda: response_cache.invalidate(*tags))
+
+
+@receiver([post_save, post_delete], sender=Chat)
+def invalidate_chat(sender, instance, **kwargs):
+    tags = ["chats", f"thread:{instance.sent_by_id}:{instance.sent_to_id}"]
+    transaction.on_commit(lambda: response_cache.invalidate(*tags))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    auth.forget_user(instance.pk)
+    # Logging in only touches last_login, which no cached response exposes.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(lambda: response_cache.invalidate("users"))
+
+
+@receiver(connection_created)
+def trace_queries(sender, connection, **kwargs):
+    tracing.install(connection)
@@ -0,0 +1,128 @@
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+
+from adwebsite.models import Chat, Product, ProductStats, SellerStats
+
+# The counter rows are changed with ``F()`` increments inside the transaction
+# of the write they count, so concurrent writers add up instead of
+# overwriting each other and a rolled back write leaves no trace.
+# ``rebuild`` recounts everything (see the reconcile_stats command).
+
+
+def bump(model, pk, deltas):
+    """Add ``deltas``, a dict of field to amount, to the ``model`` row ``pk``, creating it when adding."""
+    rows = model.objects.filter(pk=pk)
+    values = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**values) or min(deltas.values()) < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(pk=pk, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first.
+        rows.update(**values)
+
+
+def count_messages(per_product, sellers, sign):
+    per_seller = Counter()
+    for product_id, count in per_product.items():
+        bump(ProductStats, product_id, {"message_count": sign * count})
+        per_seller[sellers[product_id]] += count
+    for seller_id, count in per_seller.items():
+        bump(SellerStats, seller_id, {"message_count": sign * count})
+
+
+def add_products(products):
+    for seller_id, count in Counter(product.posted_by_id for product in products).items():
+        bump(SellerStats, seller_id, {"product_count": count})
+
+
+def remove_products(products):
+    """Take ``products``, about to be deleted along with their messages, out of their sellers' counts."""
+    # Locking the product rows holds back messages about them until the delete commits.
+    message_counts = dict(
+        ProductStats.objects.select_for_update()
+        .filter(product__in=[product.pk for product in products])
+        .values_list("product", "message_count")
+    )
+    per_seller = {}
+    for product in products:
+        deltas = per_seller.setdefault(product.posted_by_id, {"product_count": 0, "message_count": 0})
+        deltas["product_count"] -= 1
+        deltas["message_count"] -= message_counts.get(product.pk, 0)
+    for seller_id, deltas in per_seller.items():
+        bump(SellerStats, seller_id, deltas)
+
+
+def add_messages(chats):
+    """Count newly created ``chats``, whose products are loaded."""
+    sellers = {chat.product_id_id: chat.product_id.posted_by_id for chat in chats}
+    count_messages(Counter(chat.product_id_id for chat in chats), sellers, 1)
+
+
+def remove_messages(chats):
+    per_product = Counter(chat.product_id_id for chat in chats)
+    sellers = dict(Product.objects.filter(id__in=per_product).values_list("id", "posted_by"))
+    count_messages(per_product, sellers, -1)
+
+
+def remove_user(user_id):
+    """Take the messages of ``user_id`` about other sellers' products out of the counts before the user is deleted.
+
+    The user's own products and counters are deleted with the user.
+    """
+    chats = Chat.objects.filter(Q(sent_by=user_id) | Q(sent_to=user_id)).exclude(product_id__posted_by=user_id)
+    per_product = dict(chats.values_list("product_id").annotate(Count("id")).order_by())
+    if per_product:
+        sellers = dict(Product.objects.filter(id__in=per_product).values_list("id", "posted_by"))
+        count_messages(per_product, sellers, -1)
+
+
+def save_product(product):
+    with transaction.atomic():
+        product.save()
+        add_products([product])
+
+
+def delete_product(product):
+    with transaction.atomic():
+        remove_products([product])
+        product.delete()
+
+
+def delete_user(user):
+    with transaction.atomic():
+        remove_user(user.pk)
+        user.delete()
+
+
+def rebuild(batch_size=1000):
+    """Recount every counter from the products and chats. Returns the seller and product rows written."""
+    with transaction.atomic():
+        # Writers block on their counter update until the rebuild commits, so
+        # a write either is in the recount or is applied on top of it.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"LOCK TABLE {SellerStats._meta.db_table}, {ProductStats._meta.db_table} IN EXCLUSIVE MODE"
+            )
+        SellerStats.objects.all().delete()
+        ProductStats.objects.all().delete()
+
+        messages = Chat.objects.values_list("product_id").annotate(Count("id")).order_by()
+        product_rows = ProductStats.objects.bulk_create(
+            [ProductStats(product_id=product_id, message_count=count) for product_id, count in messages.iterator()],
+            batch_size=batch_size,
+        )
+
+        products = dict(Product.objects.values_list("posted_by").annotate(Count("id")).order_by())
+        seller_messages = dict(Chat.objects.values_list("product_id__posted_by").annotate(Count("id")).order_by())
+        seller_rows = SellerStats.objects.bulk_create(
+            [
+                SellerStats(seller_id=seller_id, product_count=count, message_count=seller_messages.get(seller_id, 0))
+                for seller_id, count in products.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(seller_rows), len(product_rows)
@@ -0,0 +1,258 @@
+import asyncio
+import json
+from contextlib import nullcontext
+from importlib import import_module
+from inspect import isawaitable
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aget_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+from django.http.request import validate_host
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, subscribe
+
+from adwebsite import persisted, pubsub, ratelimit
+from adwebsite.api import APIGraphQLView
+from adwebsite.cost import operation_cost
+
+PROTOCOL = "graphql-transport-ws"
+
+# Seconds a client has to send ``connection_init`` after the socket opens.
+INIT_TIMEOUT = 10
+
+
+class ProtocolError(Exception):
+    def __init__(self, code, reason):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+def scope_headers(scope):
+    return {name.decode("latin1").lower(): value.decode("latin1") for name, value in scope.get("headers", [])}
+
+
+def origin_allowed(headers):
+    """Reject cross-site sockets, which would otherwise ride on the session cookie."""
+    origin = headers.get("origin")
+    if origin is None:
+        return True
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = [".localhost", "127.0.0.1", "[::1]"]
+    return validate_host(urlsplit(origin).hostname or "", allowed_hosts)
+
+
+async def release_connections():
+    """Return database connections, as request_finished does for HTTP requests.
+
+    Sockets outlive any request, so without this the ORM thread would keep its
+    connection (and pool slot) for as long as the server runs.
+    """
+    await sync_to_async(close_old_connections)()
+
+
+async def scope_user(headers):
+    cookies = parse_cookie(headers.get("cookie", ""))
+    engine = import_module(settings.SESSION_ENGINE)
+    request = SimpleNamespace(session=engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME)))
+    return await aget_user(request)
+
+
+class Connection:
+    """One client socket speaking the ``graphql-transport-ws`` protocol.
+
+    Every operation runs in its own task and hands its messages to a bounded
+    outbox drained by a single writer.  A client that reads slowly fills the
+    outbox, which stalls its subscriptions until their own queues overflow
+    and they are ended, so one slow socket never holds up a publisher.
+
+    The client is charged the HTTP endpoint's rate limits: a request for the
+    socket and one for every operation, plus the operation's field and
+    mutation rates.  Queries and mutations count towards the client's
+    concurrency limit while they run; subscriptions, which last as long as
+    the client wants, do not.
+    """
+
+    def __init__(self, view, scope, receive, send):
+        self.view = view
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.headers = scope_headers(scope)
+        self.outbox = asyncio.Queue(pubsub.queue_size())
+        self.operations = {}
+        self.context = None
+        self.request = None
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", []) or not origin_allowed(self.headers):
+            await self.send({"type": "websocket.close", "code": 4403})
+            return
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+
+        writer = asyncio.create_task(self.write())
+        try:
+            await self.read()
+        except ProtocolError as e:
+            await self.outbox.put({"type": "websocket.close", "code": e.code, "reason": e.reason})
+            await self.outbox.join()
+        finally:
+            for task in self.operations.values():
+                task.cancel()
+            writer.cancel()
+
+    async def write(self):
+        while True:
+            message = await self.outbox.get()
+            try:
+                await self.send(message)
+            finally:
+                self.outbox.task_done()
+
+    async def reply(self, message):
+        await self.outbox.put({"type": "websocket.send", "text": json.dumps(message)})
+
+    async def read(self):
+        try:
+            message = await asyncio.wait_for(self.receive(), INIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ProtocolError(4408, "Connection initialisation timeout")
+        while message["type"] == "websocket.receive":
+            await self.handle(self.parse(message))
+            message = await self.receive()
+
+    def parse(self, message):
+        try:
+            data = json.loads(message.get("text") or message.get("bytes") or "")
+        except ValueError:
+            raise ProtocolError(4400, "Invalid message")
+        if not isinstance(data, dict) or not isinstance(data.get("type"), str):
+            raise ProtocolError(4400, "Invalid message")
+        return data
+
+    async def handle(self, data):
+        kind = data["type"]
+        if kind == "connection_init":
+            if self.context is not None:
+                raise ProtocolError(4429, "Too many initialisation requests")
+            user = await scope_user(self.headers)
+            # Stands in for the HTTP request in rate limit keys.
+            self.request = SimpleNamespace(META={"REMOTE_ADDR": (self.scope.get("client") or [""])[0]}, user=user)
+            try:
+                ratelimit.check_request(self.key())
+            except ratelimit.RateLimited as e:
+                raise ProtocolError(4429, str(e))
+            self.context = SimpleNamespace(user=user)
+            await self.reply({"type": "connection_ack"})
+        elif kind == "ping":
+            await self.reply({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif kind == "subscribe":
+            if self.context is None:
+                raise ProtocolError(4401, "Unauthorized")
+            id = data.get("id")
+            if not isinstance(id, str) or not isinstance(data.get("payload"), dict):
+                raise ProtocolError(4400, "Invalid message")
+            if id in self.operations:
+                raise ProtocolError(4409, f"Subscriber for {id} already exists")
+            self.operations[id] = asyncio.create_task(self.operation(id, data["payload"]))
+        elif kind == "complete":
+            task = self.operations.pop(data.get("id"), None)
+            if task is not None:
+                task.cancel()
+        else:
+            raise ProtocolError(4400, f"Unknown message type: {kind}")
+
+    async def operation(self, id, payload):
+        try:
+            result = await self.execute(payload)
+            if isinstance(result, ExecutionResult):
+                if result.data is None and result.errors:
+                    await self.reply({"type": "error", "id": id, "payload": [self.view.format_error(e) for e in result.errors]})
+                    return
+                await self.reply({"type": "next", "id": id, "payload": self.format_result(result)})
+            else:
+                try:
+                    async for item in result:
+                        await release_connections()
+                        await self.reply({"type": "next", "id": id, "payload": self.format_result(item)})
+                except Exception as e:
+                    await self.reply({"type": "next", "id": id, "payload": {"errors": [self.view.format_error(e)]}})
+                finally:
+                    await result.aclose()
+            await self.reply({"type": "complete", "id": id})
+        except ratelimit.RateLimited as e:
+            await self.reply({"type": "error", "id": id, "payload": [e.error()]})
+        finally:
+            await release_connections()
+            if self.operations.get(id) is asyncio.current_task():
+                del self.operations[id]
+
+    def key(self):
+        return ratelimit.client_key(self.request, self.request.user)
+
+    def check_rate_limits(self, document, operation, operation_name, variables):
+        if operation is not None:
+            cost, _ = operation_cost(self.view.schema.graphql_schema, document, operation_name, variables)
+            self.view.check_rate_limits(self.request, document, operation, cost)
+
+    def format_result(self, result):
+        response = {"data": result.data}
+        if result.errors:
+            response["errors"] = [self.view.format_error(e) for e in result.errors]
+        return response
+
+    async def execute(self, payload):
+        ratelimit.check_request(self.key())
+        extensions = payload.get("extensions") or {}
+        sha256_hash = (extensions.get("persistedQuery") or {}).get("sha256Hash")
+        try:
+            document, validation_errors = self.view.load_document(payload.get("query"), sha256_hash)
+        except persisted.PersistedQueryError as e:
+            return ExecutionResult(errors=[GraphQLError(str(e), extensions={"code": e.code})])
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+        if validation_errors:
+            return ExecutionResult(errors=validation_errors)
+
+        # Each operation gets its own loaders.
+        context = SimpleNamespace(user=self.context.user)
+        options = {
+            "context_value": context,
+            "variable_values": payload.get("variables"),
+            "operation_name": payload.get("operationName"),
+        }
+        schema = self.view.schema.graphql_schema
+        operation = get_operation_ast(document, options["operation_name"])
+        self.check_rate_limits(document, operation, options["operation_name"], options["variable_values"])
+        if operation is not None and operation.operation == OperationType.SUBSCRIPTION:
+            return await subscribe(schema, document, **options)
+        running = ratelimit.inflight.hold(self.key(), ratelimit.max_concurrency()) if ratelimit.enabled() else nullcontext()
+        with running:
+            result = execute(schema, document, **options)
+            if isawaitable(result):
+                result = await result
+        return result
+
+
+class GraphQLWebSocket:
+    """ASGI application serving GraphQL subscriptions on the GraphQL path."""
+
+    def __init__(self, schema, path="/graphql"):
+        self.view = APIGraphQLView(schema=schema)
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["path"].rstrip("/") != self.path:
+            await receive()
+            await send({"type": "websocket.close", "code": 4404})
+            return
+        await Connection(self.view, scope, receive, send).run()
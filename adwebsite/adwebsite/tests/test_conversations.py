@@ -0,0 +1,81 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.test import TestCase
+from django.utils import timezone
+
+from adwebsite import bulk, conversations
+from adwebsite.models import Chat, Conversation, Product, User
+
+
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user("seller")
+        self.buyer = User.objects.create_user("buyer")
+        self.product = Product.objects.create(
+            product_name="Bike", product_description="Red", product_price=100, posted_by=self.seller
+        )
+        self.started = timezone.now()
+
+    def send(self, sender, recipient, minutes):
+        chat = Chat(
+            message=f"message {minutes}", sent_by=sender, sent_to=recipient, product_id=self.product,
+            message_timing=self.started + timedelta(minutes=minutes),
+        )
+        conversations.save_message(chat)
+        return chat
+
+    def conversation(self):
+        return Conversation.objects.get(product=self.product)
+
+    def test_deleting_unread_message_decrements_recipient_count(self):
+        self.send(self.buyer, self.seller, 1)
+        unread = self.send(self.buyer, self.seller, 2)
+        self.send(self.buyer, self.seller, 3)
+        self.send(self.seller, self.buyer, 4)
+        self.assertEqual(self.conversation().seller_unread, 3)
+
+        conversations.delete_message(unread)
+
+        conversation = self.conversation()
+        self.assertEqual(conversation.seller_unread, 2)
+        self.assertEqual(conversation.buyer_unread, 1)
+        self.assertEqual(conversation.last_message, "message 4")
+
+    def test_deleting_read_message_keeps_count(self):
+        self.send(self.seller, self.buyer, 0)
+        read = self.send(self.buyer, self.seller, 1)
+        Conversation.objects.update(seller_unread=0)
+        unread = self.send(self.buyer, self.seller, 2)
+
+        conversations.delete_message(read)
+        self.assertEqual(self.conversation().seller_unread, 1)
+
+        conversations.delete_message(unread)
+        conversation = self.conversation()
+        self.assertEqual(conversation.seller_unread, 0)
+        self.assertEqual(conversation.buyer_unread, 1)
+        self.assertEqual(conversation.last_message, "message 0")
+
+    def test_deleting_last_message_deletes_conversation(self):
+        chat = self.send(self.buyer, self.seller, 1)
+
+        conversations.delete_message(chat)
+
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_bulk_delete_decrements_count(self):
+        read = self.send(self.buyer, self.seller, 1)
+        Conversation.objects.update(seller_unread=0)
+        first = self.send(self.buyer, self.seller, 2)
+        self.send(self.buyer, self.seller, 3)
+        last = self.send(self.buyer, self.seller, 4)
+
+        results, errors = bulk.delete_messages([
+            SimpleNamespace(id=chat.pk, user_id=self.buyer.pk) for chat in (read, first, last)
+        ])
+
+        self.assertEqual(errors, [])
+        conversation = self.conversation()
+        self.assertEqual(conversation.seller_unread, 1)
+        self.assertEqual(conversation.last_message, "message 3")
@@ -0,0 +1,69 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from adwebsite.management.commands.benchmark_browse import plan_nodes
+from adwebsite.tests.test_queries import create_marketplace, execute
+
+
+class IndexUsageTests(TestCase):
+    """The thread and seller reads are answered by an index scan in the requested order.
+
+    The test tables are tiny, so the planner is kept from the sequential and
+    bitmap scans and sorts it would rightly prefer for them; a sort left in
+    the plan means no index yields the rows in order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller, cls.buyer, cls.products = create_marketplace()
+
+    def plan(self, query, variables):
+        with CaptureQueriesContext(connection) as queries:
+            result = execute(query, self.seller, variables)
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(queries), 1)
+        with connection.cursor() as cursor:
+            for setting in ("enable_seqscan", "enable_bitmapscan", "enable_sort", "enable_incremental_sort"):
+                cursor.execute(f"SET LOCAL {setting} = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {queries[0]['sql']}")
+            explained = cursor.fetchone()[0]
+        if isinstance(explained, str):
+            explained = json.loads(explained)
+        return list(plan_nodes(explained[0]["Plan"]))
+
+    def assertIndexScan(self, index, query, variables):
+        nodes = self.plan(query, variables)
+        self.assertTrue(any(f"({index})" in node and "Index" in node for node in nodes), nodes)
+        self.assertFalse(any("Sort" in node for node in nodes), nodes)
+
+    def test_thread_uses_chat_thread_idx(self):
+        self.assertIndexScan(
+            "chat_thread_idx",
+            "query($by: Int, $to: Int) { readMessage(sentby: $by, sentto: $to) { message messageTiming } }",
+            {"by": self.buyer.pk, "to": self.seller.pk},
+        )
+
+    def test_seller_products_use_product_seller_idx(self):
+        self.assertIndexScan(
+            "product_seller_idx",
+            "query($userid: Int) { readProduct(userid: $userid) { productName postedOn } }",
+            {"userid": self.seller.pk},
+        )
+
+    def test_seller_browse_orders_use_seller_indexes(self):
+        query = (
+            "query($filter: ProductFilter, $orderBy: [ProductOrder!]) { products(filter: $filter, orderBy: $orderBy, first: 10) "
+            "{ edges { node { productName } } } }"
+        )
+        for order_by, index in (
+            (["POSTED_ON_DESC"], "product_seller_idx"),
+            (["POSTED_ON_ASC"], "product_seller_idx"),
+            (["PRICE_ASC"], "product_seller_price_idx"),
+            (["PRICE_DESC", "POSTED_ON_DESC"], "product_seller_price_idx"),
+        ):
+            for filter in ({"postedBy": self.seller.pk}, {"postedBy": self.seller.pk, "priceMin": 10, "priceMax": 500}):
+                with self.subTest(order_by=order_by, filter=filter):
+                    self.assertIndexScan(index, query, {"filter": filter, "orderBy": order_by})
@@ -0,0 +1,39 @@
+from django.test import Client, TestCase, override_settings
+
+from adwebsite import ratelimit
+from adwebsite.models import User
+
+
+@override_settings(RATELIMIT_LOGIN="3/m", RATELIMIT_LOGIN_CLIENT="5/m", RATELIMIT_LOGIN_USERNAME="6/m")
+class LoginRateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("seller", "seller@example.com", "password")
+
+    def setUp(self):
+        ratelimit._store = ratelimit.LocalStore()
+
+    def login(self, address, username="seller", password="wrong"):
+        client = Client(REMOTE_ADDR=address)
+        return client.post("/login/", {"username": username, "password": password})
+
+    def test_guessing_client_does_not_lock_owner_out(self):
+        for _ in range(3):
+            self.assertEqual(self.login("10.0.0.1").status_code, 302)
+        self.assertEqual(self.login("10.0.0.1").status_code, 429)
+
+        response = self.login("10.0.0.2", password="password")
+        self.assertRedirects(response, "/home/", fetch_redirect_response=False)
+
+    def test_client_limit_spans_usernames(self):
+        for name in ("a", "b", "c", "d", "e"):
+            self.assertEqual(self.login("10.0.0.1", username=name).status_code, 302)
+        self.assertEqual(self.login("10.0.0.1", username="f").status_code, 429)
+
+    def test_username_limit_spans_clients(self):
+        for address in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            for _ in range(2):
+                self.assertEqual(self.login(address).status_code, 302)
+        response = self.login("10.0.0.4", password="password")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
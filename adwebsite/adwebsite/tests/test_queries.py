@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, TransactionTestCase
+
+from adwebsite import conversations, stats
+from adwebsite.management.commands.benchmark import OPERATIONS
+from adwebsite.models import Chat, Product, User
+from adwebsite.schema import schema
+
+# SQL queries each operation of ``manage.py benchmark`` runs, in its order.
+# A change here should be a deliberate one, like the benchmark's query column.
+BENCHMARK_QUERIES = {
+    "listProducts": 1,
+    "readProduct": 1,
+    "readMessage": 1,
+    "readThread": 1,
+    "inbox": 1,
+    "createUser": 2,
+    "updateUser": 2,
+    "deleteUser": 11,
+    "createProduct": 3,
+    "updateProduct": 2,
+    "createMessage": 14,
+    "updateMessage": 3,
+    "deleteMessage": 9,
+    "deleteProduct": 7,
+}
+
+# Operations run in a transaction, whose BEGIN and COMMIT assertNumQueries
+# counts as well; the benchmark's trace does not.
+TRANSACTIONS = {"deleteUser", "createProduct", "createMessage", "updateMessage", "deleteMessage", "deleteProduct"}
+
+
+def execute(query, viewer, variables=None):
+    # A fresh context per operation, as every request gets.
+    return async_to_sync(schema.execute_async)(
+        query, variable_values=variables, context_value=SimpleNamespace(user=viewer)
+    )
+
+
+def create_marketplace():
+    """A seller with two products and a buyer who has asked about one of them."""
+    seller = User.objects.create_user("seller", "seller@example.com", "password")
+    buyer = User.objects.create_user("buyer", "buyer@example.com", "password")
+    products = []
+    for name, price in (("Red mountain bike", 250), ("Bike helmet", 40)):
+        product = Product(product_name=name, product_description="Barely used", product_price=price, posted_by=seller)
+        stats.save_product(product)
+        products.append(product)
+    for text in ("Is the bike still available?", "Would you take 200?"):
+        conversations.save_message(Chat(message=text, sent_by=buyer, sent_to=seller, product_id=products[0]))
+    return seller, buyer, products
+
+
+class BenchmarkQueryCountTests(TransactionTestCase):
+    # Mutations commit as they would in production, so their counts match the benchmark's.
+
+    def setUp(self):
+        self.seller, self.buyer, _ = create_marketplace()
+
+    def test_benchmark_operations(self):
+        state = {"buyer": self.buyer.pk, "seller": self.seller.pk, "run": "test"}
+        for operation in OPERATIONS:
+            with self.subTest(operation["name"]):
+                count = BENCHMARK_QUERIES[operation["name"]] + 2 * (operation["name"] in TRANSACTIONS)
+                with self.assertNumQueries(count):
+                    result = execute(operation["query"], self.seller, operation["variables"](state))
+                self.assertIsNone(result.errors)
+                if "store" in operation:
+                    operation["store"](state, result.data)
+
+
+class ReadQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller, cls.buyer, cls.products = create_marketplace()
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+
+    def assertQueries(self, count, query, viewer=None, variables=None):
+        with self.assertNumQueries(count):
+            result = execute(query, viewer or self.seller, variables)
+        self.assertIsNone(result.errors)
+        return result.data
+
+    def test_products(self):
+        data = self.assertQueries(
+            1,
+            "query($by: Int) { products(filter: {postedBy: $by, priceMin: 10}, orderBy: [PRICE_ASC], first: 10) "
+            "{ edges { node { productName productPrice postedBy { username } } } } }",
+            variables={"by": self.seller.pk},
+        )
+        self.assertEqual(len(data["products"]["edges"]), 2)
+
+    def test_search_products(self):
+        data = self.assertQueries(
+            1, '{ searchProducts(query: "bike", priceMax: 300) { edges { node { productName postedBy { username } } } } }'
+        )
+        self.assertEqual(len(data["searchProducts"]["edges"]), 2)
+
+    def test_list_messages(self):
+        data = self.assertQueries(
+            1, "{ listMessages(first: 10) { edges { node { message sentBy { username } productId { productName } } } } }"
+        )
+        self.assertEqual(len(data["listMessages"]["edges"]), 2)
+
+    def test_list_users(self):
+        data = self.assertQueries(1, "{ listUsers { username email } }", viewer=self.admin)
+        self.assertEqual(len(data["listUsers"]), 3)
+
+    def test_stats(self):
+        data = self.assertQueries(
+            2,
+            "query($seller: Int!, $product: Int!) { sellerStats(userid: $seller) { productCount messageCount } "
+            "productStats(productId: $product) { messageCount } }",
+            variables={"seller": self.seller.pk, "product": self.products[0].pk},
+        )
+        self.assertEqual(data["sellerStats"], {"productCount": 2, "messageCount": 2})
+        self.assertEqual(data["productStats"], {"messageCount": 2})
@@ -0,0 +1,177 @@
+import json
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from inspect import isawaitable
+from time import perf_counter
+
+from django.conf import settings
+
+from adwebsite.metrics import registry
+
+logger = logging.getLogger("adwebsite.graphql")
+slow_logger = logging.getLogger("adwebsite.graphql.slow")
+
+# Statements kept per operation for the slow-operation log.
+MAX_CAPTURED_QUERIES = 100
+
+# The trace of the operation being executed.  Context variables follow the
+# operation into ``sync_to_async`` threads, where the ORM runs its queries.
+current_trace = ContextVar("graphql_trace", default=None)
+
+
+def tracing_enabled():
+    return getattr(settings, "GRAPHQL_TRACING", False)
+
+
+def slow_operation_ms():
+    return getattr(settings, "GRAPHQL_SLOW_OPERATION_MS", 500)
+
+
+class Trace:
+    """Timings of one GraphQL operation: wall time, SQL and resolvers."""
+
+    def __init__(self, operation, keep_resolvers=False):
+        self.operation = operation or "anonymous"
+        self.start_time = datetime.now(timezone.utc)
+        self.started = perf_counter()
+        self.finished = None
+        self.completed = False
+        self.failed = False
+        self.query_count = 0
+        self.db_time = 0.0
+        self.queries = []
+        # "Type.field" -> [seconds, calls]
+        self.fields = defaultdict(lambda: [0.0, 0])
+        self.resolvers = [] if keep_resolvers else None
+
+    @property
+    def duration(self):
+        return (self.finished or perf_counter()) - self.started
+
+    def record_query(self, sql, duration):
+        self.query_count += 1
+        self.db_time += duration
+        if len(self.queries) < MAX_CAPTURED_QUERIES:
+            self.queries.append((sql, duration))
+
+    def record_resolver(self, info, started, finished):
+        field = self.fields[f"{info.parent_type.name}.{info.field_name}"]
+        field[0] += finished - started
+        field[1] += 1
+        if self.resolvers is not None:
+            self.resolvers.append({
+                "path": info.path.as_list(),
+                "parentType": info.parent_type.name,
+                "fieldName": info.field_name,
+                "returnType": str(info.return_type),
+                "startOffset": int((started - self.started) * 1e9),
+                "duration": int((finished - started) * 1e9),
+            })
+
+    def extension(self):
+        """The ``tracing`` response extension, in the Apollo tracing format plus SQL totals."""
+        return {
+            "version": 1,
+            "startTime": self.start_time.isoformat(),
+            "endTime": datetime.now(timezone.utc).isoformat(),
+            "duration": int(self.duration * 1e9),
+            "execution": {"resolvers": self.resolvers or []},
+            "sql": {"count": self.query_count, "duration": int(self.db_time * 1e9)},
+        }
+
+    def summary(self):
+        return {
+            "operation": self.operation,
+            "durationMs": round(self.duration * 1000, 2),
+            "sqlCount": self.query_count,
+            "dbMs": round(self.db_time * 1000, 2),
+            "failed": self.failed,
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` hook timing queries run on behalf of the current operation."""
+    trace = current_trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace.record_query(sql, perf_counter() - started)
+
+
+def install(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def operation(name):
+    """Trace the operation run inside the block and report it when the block exits."""
+    trace = Trace(name, keep_resolvers=tracing_enabled())
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        trace.finished = perf_counter()
+        if trace.completed:
+            report(trace)
+
+
+def name_operation(operation_ast):
+    trace = current_trace.get()
+    if trace is not None and operation_ast is not None and operation_ast.name:
+        trace.operation = operation_ast.name.value
+
+
+def finish(trace, result):
+    """Note the outcome of ``result`` and attach the tracing extension when enabled.
+
+    Requests that executed nothing, such as loading GraphiQL, are not reported.
+    """
+    if result is None:
+        return
+    trace.completed = True
+    trace.failed = bool(result.errors)
+    if tracing_enabled():
+        result.extensions = {**(result.extensions or {}), "tracing": trace.extension()}
+
+
+def report(trace):
+    registry.record(trace)
+    summary = trace.summary()
+    logger.info(json.dumps(summary))
+    threshold = slow_operation_ms()
+    if threshold and summary["durationMs"] >= threshold:
+        slowest = sorted(trace.fields.items(), key=lambda item: item[1][0], reverse=True)[:10]
+        slow_logger.warning(json.dumps({
+            **summary,
+            "resolvers": [{"field": field, "ms": round(seconds * 1000, 2), "calls": calls} for field, (seconds, calls) in slowest],
+            "queries": [{"sql": sql, "ms": round(duration * 1000, 2)} for sql, duration in trace.queries],
+        }))
+
+
+class TracingMiddleware:
+    """Graphene middleware timing every resolver of a traced operation."""
+
+    def resolve(self, next, root, info, **args):
+        trace = current_trace.get()
+        if trace is None:
+            return next(root, info, **args)
+        started = perf_counter()
+        result = next(root, info, **args)
+        if isawaitable(result):
+            return self.resolve_async(trace, info, started, result)
+        trace.record_resolver(info, started, perf_counter())
+        return result
+
+    async def resolve_async(self, trace, info, started, result):
+        try:
+            return await result
+        finally:
+            trace.record_resolver(info, started, perf_counter())
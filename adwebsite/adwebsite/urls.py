@@ -1,17 +1,23 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView 
+from adwebsite.api import APIGraphQLView, AsyncAPIGraphQLView
+from adwebsite.ratelimit import graphql_limits
 from adwebsite.schema import schema
-from adwebsite.views import login_page, home, custom_logout
+from adwebsite.views import login_page, home, custom_logout, metrics, export
 from django.contrib.auth import views as auth_views
 
+GraphQLAPIView = AsyncAPIGraphQLView if settings.GRAPHQL_ASYNC else APIGraphQLView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql', csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema))),
+    path('graphql', graphql_limits(csrf_exempt(GraphQLAPIView.as_view(graphiql=True, schema=schema)))),
     path('accounts/', include("django.contrib.auth.urls")),
     path('login/', login_page, name='login_page'),
     path('home/', home, name="home"),
-    path('logout/', custom_logout, name="logout")
+    path('logout/', custom_logout, name="logout"),
+    path('metrics', metrics, name="metrics"),
+    path('export/<str:table>', export, name="export"),
 
 ]
@@ -1,26 +1,45 @@
 # Import necessary modules and models
+import hmac
+from asgiref.sync import async_to_sync
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from .models import *
 from .query import get_products
-import requests
+from .schema import schema
+from . import persisted, ratelimit, response_cache
+from .export import FORMATS, TABLES, astream, export_until, parse_watermark, stream
+from .metrics import pool_metrics, registry
+from .response_cache import tagged_key
 
 def login_page(request):
     if request.method == "POST":
         username = request.POST.get('username')
         password = request.POST.get('password')
-        
-        if not User.objects.filter(username=username).exists():
-            messages.error(request, 'Invalid Username')
-            return redirect('/login/')
-        
+
+        # Attempts are limited before any password is hashed: strictly per client and
+        # username, then per client, and last per username, so that attempts other
+        # clients' limits already refuse do not spend the account's shared budget.
+        client = ratelimit.client_key(request, None)
+        account = ratelimit.username_key(username)
+        try:
+            ratelimit.check("login", f"{client}:{account}", getattr(settings, "RATELIMIT_LOGIN", None))
+            ratelimit.check("login-client", client, getattr(settings, "RATELIMIT_LOGIN_CLIENT", None))
+            ratelimit.check("login-username", account, getattr(settings, "RATELIMIT_LOGIN_USERNAME", None))
+        except ratelimit.RateLimited as e:
+            response = HttpResponse(f"Too many login attempts, retry in {e.retry_after} seconds", status=429)
+            response["Retry-After"] = str(e.retry_after)
+            return response
+
+        # One lookup: authenticate() fails the same way for unknown users and wrong passwords.
         user = authenticate(username=username, password=password)
         
         if user is None:
-            messages.error(request, "Invalid Password")
+            messages.error(request, "Invalid username or password")
             return redirect('/login/')
         else:
             login(request, user)
@@ -32,10 +51,67 @@ def custom_logout(request):
     logout(request)
     return redirect('/login/')
 
+def list_products(request):
+    result = async_to_sync(schema.execute_async)(get_products(), context_value=request)
+    if result.errors:
+        raise result.errors[0]
+    return [edge["node"] for edge in result.data["listProducts"]["edges"]]
+
 @login_required
 def home(request):
     username = request.user.username
-    url = "http://127.0.0.1:8000/graphql"
-    product = get_products()
-    grapql_request = requests.post(url=url, json={"query": product}) 
-    return render(request, 'home.html', {'username': username, 'products': product})
+    key = tagged_key("home-products", ["products", "users"], request.user.pk)
+    products = cache.get(key)
+    if products is None:
+        products = list_products(request)
+        cache.set(key, products, settings.HOME_CACHE_TIMEOUT)
+    return render(request, 'home.html', {'username': username, 'products': products})
+
+def metrics(request):
+    """Prometheus metrics of this worker, for scrapers holding GRAPHQL_METRICS_TOKEN or for staff."""
+    token = settings.GRAPHQL_METRICS_TOKEN
+    if token:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return HttpResponseForbidden()
+    elif not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    responses = response_cache.stats.as_dict()
+    documents = persisted.documents.stats()
+    extra = [
+        ("graphql_response_cache_hits_total", "counter", "Responses served from the response cache.", responses["hits"]),
+        ("graphql_response_cache_misses_total", "counter", "Cacheable responses that had to be executed.", responses["misses"]),
+        ("graphql_response_cache_invalidations_total", "counter", "Response cache tags invalidated.", responses["invalidations"]),
+        ("graphql_document_cache_hits_total", "counter", "Documents found in the document cache.", documents["hits"]),
+        ("graphql_document_cache_misses_total", "counter", "Documents parsed and validated.", documents["misses"]),
+        ("graphql_document_cache_size", "gauge", "Documents held in the document cache.", documents["size"]),
+        *pool_metrics(),
+        *ratelimit.stats.metrics(),
+    ]
+    return HttpResponse(registry.render(extra), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+def export(request, table):
+    """Stream ``table`` to staff as NDJSON or CSV.
+
+    ``since`` and ``until`` select a window of posted_on / message_timing,
+    which ends ``EXPORT_WATERMARK_LAG`` seconds ago at the latest; the
+    ``X-Export-Watermark`` header is the ``since`` of the next incremental export.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    if table not in TABLES:
+        raise Http404(f"No export named {table}")
+    format = request.GET.get("format", "ndjson")
+    if format not in FORMATS:
+        return HttpResponseBadRequest(f"Unsupported format: {format}")
+    try:
+        since = parse_watermark(request.GET.get("since"))
+        until = export_until(parse_watermark(request.GET.get("until")))
+    except ValueError:
+        return HttpResponseBadRequest("since and until must be ISO 8601 timestamps")
+
+    content = (astream if settings.GRAPHQL_ASYNC else stream)(table, format, since, until)
+    response = StreamingHttpResponse(content, content_type=FORMATS[format])
+    response["Content-Disposition"] = f'attachment; filename="{table}.{format}"'
+    response["X-Export-Watermark"] = until.isoformat()
+    return response